@@ -14,25 +14,37 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from tie_breaker import TieBreaker
+from common_functions import aggregate_ballots
+from ballot_view import BallotView
+from stats import Stats, Instrumented
 from abc import ABCMeta, abstractmethod
-from copy import copy, deepcopy
+from copy import copy
 import types
 
 
 # This class provides methods that most electoral systems make use of.
-class VotingSystem(object):
+# Statistics on the count are collected when requested through stats, which
+# may be a Stats object, True, or a callback to report them to.
+class VotingSystem(Instrumented):
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, tie_breaker=None):
-        self.ballots = ballots
-        for ballot in self.ballots:
-            if "count" not in ballot:
-                ballot["count"] = 1
+    def __init__(self, ballots, tie_breaker=None, stats=None):
+        self.ballots, entries = aggregate_ballots(ballots)
+        if not hasattr(self, 'ballot_entries'):
+            self.ballot_entries = entries
+        self.compression_ratio = float(self.ballot_entries) / len(self.ballots) if self.ballots else 1.0
         self.tie_breaker = tie_breaker
         if isinstance(self.tie_breaker, types.ListType):
             self.tie_breaker = TieBreaker(self.tie_breaker)
-        self.calculate_results()
+        self.stats = Stats.coerce(stats)
+        self.calculate(self.calculate_results)
+
+    def calculate(self, calculation):
+        if self.stats is None:
+            calculation()
+        else:
+            self.stats.calculate(self, calculation)
 
     @abstractmethod
     def as_dict(self):
@@ -40,9 +52,12 @@ class VotingSystem(object):
         data["candidates"] = self.candidates
         if self.tie_breaker and self.tie_breaker.ties_broken:
             data["tie_breaker"] = self.tie_breaker.as_list()
+        if self.stats is not None:
+            data["stats"] = self.stats.as_dict()
         return data
 
     def break_ties(self, tied_objects, reverse_order=False):
+        self.stats_count("ties_broken")
         if self.tie_breaker is None:
             self.tie_breaker = TieBreaker(self.candidates)
         return self.tie_breaker.break_ties(tied_objects, reverse_order)
@@ -53,8 +68,8 @@ class FixedWinnerVotingSystem(VotingSystem):
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, tie_breaker=None):
-        super(FixedWinnerVotingSystem, self).__init__(ballots, tie_breaker)
+    def __init__(self, ballots, tie_breaker=None, stats=None):
+        super(FixedWinnerVotingSystem, self).__init__(ballots, tie_breaker, stats=stats)
 
     def as_dict(self):
         data = super(FixedWinnerVotingSystem, self).as_dict()
@@ -68,9 +83,9 @@ class MultipleWinnerVotingSystem(FixedWinnerVotingSystem):
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, tie_breaker=None, required_winners=1):
+    def __init__(self, ballots, tie_breaker=None, required_winners=1, stats=None):
         self.required_winners = required_winners
-        super(MultipleWinnerVotingSystem, self).__init__(ballots, tie_breaker)
+        super(MultipleWinnerVotingSystem, self).__init__(ballots, tie_breaker, stats=stats)
 
     def calculate_results(self):
         if self.required_winners == len(self.candidates):
@@ -87,8 +102,8 @@ class SingleWinnerVotingSystem(FixedWinnerVotingSystem):
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, tie_breaker=None):
-        super(SingleWinnerVotingSystem, self).__init__(ballots, tie_breaker)
+    def __init__(self, ballots, tie_breaker=None, stats=None):
+        super(SingleWinnerVotingSystem, self).__init__(ballots, tie_breaker, stats=stats)
 
     def as_dict(self):
         data = super(SingleWinnerVotingSystem, self).as_dict()
@@ -101,13 +116,20 @@ class AbstractSingleWinnerVotingSystem(SingleWinnerVotingSystem):
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, multiple_winner_class, tie_breaker=None):
+    def __init__(self, ballots, multiple_winner_class, tie_breaker=None, stats=None):
         self.multiple_winner_class = multiple_winner_class
-        super(AbstractSingleWinnerVotingSystem, self).__init__(ballots, tie_breaker=tie_breaker)
+        super(AbstractSingleWinnerVotingSystem, self).__init__(ballots, tie_breaker=tie_breaker, stats=stats)
 
     def calculate_results(self):
-        self.multiple_winner_instance = self.multiple_winner_class(self.ballots, tie_breaker=self.tie_breaker, required_winners=1)
+        self.multiple_winner_instance = self.multiple_winner_class(
+            self.ballots,
+            tie_breaker=self.tie_breaker,
+            required_winners=1,
+            stats=self.stats,
+        )
+        ballot_entries, compression_ratio = self.ballot_entries, self.compression_ratio
         self.__dict__.update(self.multiple_winner_instance.__dict__)
+        self.ballot_entries, self.compression_ratio = ballot_entries, compression_ratio
         self.winner = list(self.winners)[0]
         del self.winners
 
@@ -123,9 +145,9 @@ class OrderingVotingSystem(VotingSystem):
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, tie_breaker=None, winner_threshold=None):
+    def __init__(self, ballots, tie_breaker=None, winner_threshold=None, stats=None):
         self.winner_threshold = winner_threshold
-        super(OrderingVotingSystem, self).__init__(ballots, tie_breaker=tie_breaker)
+        super(OrderingVotingSystem, self).__init__(ballots, tie_breaker=tie_breaker, stats=stats)
 
     def as_dict(self):
         data = super(OrderingVotingSystem, self).as_dict()
@@ -135,19 +157,25 @@ class OrderingVotingSystem(VotingSystem):
 
 # Given a single winner system, generate a non-proportional ordering by
 # sequentially removing the winner and rerunning the election with the
-# smaller subset of candidates until all candidates are consumed.
+# smaller subset of candidates until all candidates are consumed. Every round
+# reads the same ballots through a view that excludes the earlier winners.
 class AbstractOrderingVotingSystem(OrderingVotingSystem):
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, single_winner_class, winner_threshold=None, tie_breaker=None):
+    def __init__(self, ballots, single_winner_class, winner_threshold=None, tie_breaker=None, stats=None):
         self.single_winner_class = single_winner_class
-        super(AbstractOrderingVotingSystem, self).__init__(ballots, winner_threshold=winner_threshold, tie_breaker=tie_breaker)
+        super(AbstractOrderingVotingSystem, self).__init__(
+            ballots,
+            winner_threshold=winner_threshold,
+            tie_breaker=tie_breaker,
+            stats=stats,
+        )
 
     def calculate_results(self):
         self.order = []
         self.rounds = []
-        remaining_ballots = deepcopy(self.ballots)
+        remaining_ballots = BallotView(self.ballots)
         remaining_candidates = True
         while (
             (remaining_candidates is True or len(remaining_candidates) > 1)
@@ -155,7 +183,7 @@ class AbstractOrderingVotingSystem(OrderingVotingSystem):
         ):
 
             # Given the remaining ballots, who should win?
-            result = self.single_winner_class(deepcopy(remaining_ballots), tie_breaker=self.tie_breaker)
+            result = self.single_winner_class(remaining_ballots, tie_breaker=self.tie_breaker, stats=self.stats)
 
             # Mark the candidate that won
             r = {'winner': result.winner}
@@ -173,7 +201,7 @@ class AbstractOrderingVotingSystem(OrderingVotingSystem):
                 self.candidates = result.candidates
                 remaining_candidates = copy(self.candidates)
             remaining_candidates.remove(result.winner)
-            remaining_ballots = self.ballots_without_candidate(result.ballots, result.winner)
+            remaining_ballots = self.ballots_without_candidate(remaining_ballots, result.winner)
 
         # Note the last remaining candidate
         if (self.winner_threshold is None or len(self.order) < self.winner_threshold):
@@ -181,6 +209,10 @@ class AbstractOrderingVotingSystem(OrderingVotingSystem):
             self.order.append(r['winner'])
             self.rounds.append(r)
 
+    @staticmethod
+    def ballots_without_candidate(ballots, candidate):
+        return ballots.without(candidate)
+
     def as_dict(self):
         data = super(AbstractOrderingVotingSystem, self).as_dict()
         data["rounds"] = self.rounds
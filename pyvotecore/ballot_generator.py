@@ -0,0 +1,244 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# This module generates synthetic ballots for load testing and capacity
+# planning. Voters' preferences are drawn from one of several models:
+#
+# * impartial culture, where every ranking is equally likely
+# * Mallows, where rankings grow less likely the further they stray from a
+#   reference ranking, at a rate set by the dispersion (0 < phi <= 1)
+# * Plackett-Luce, where candidates are picked one at a time in proportion
+#   to their weights
+# * spatial, where voters and candidates are placed at random in a unit cube
+#   and voters rank candidates by distance
+#
+# Rankings can then be truncated and can tie adjacent candidates, and are
+# written in any of the notations the voting systems accept. Ballots are
+# generated in batches, vectorized with numpy when it is available, and are
+# either streamed one by one or collapsed into weighted ballots. A given seed
+# always produces the same ballots, though the numpy and pure Python
+# generators produce different ones.
+from condorcet import CondorcetHelper
+from common_functions import canonical_ballot
+import random
+import bisect
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BATCH_SIZE = 100000
+
+
+class BallotGenerator(object):
+
+    MODEL_IMPARTIAL_CULTURE = "impartial_culture"
+    MODEL_MALLOWS = "mallows"
+    MODEL_PLACKETT_LUCE = "plackett_luce"
+    MODEL_SPATIAL = "spatial"
+
+    BALLOT_NOTATION_GROUPING = CondorcetHelper.BALLOT_NOTATION_GROUPING
+    BALLOT_NOTATION_RANKING = CondorcetHelper.BALLOT_NOTATION_RANKING
+    BALLOT_NOTATION_RATING = CondorcetHelper.BALLOT_NOTATION_RATING
+    BALLOT_NOTATION_ORDERED = "ordered"
+    BALLOT_NOTATION_SINGLE = "single"
+
+    def __init__(self, candidates, model=MODEL_IMPARTIAL_CULTURE, seed=None, truncation_rate=0.0, tie_rate=0.0,
+                 reference=None, dispersion=0.5, weights=None, dimensions=2):
+        if model not in (
+            BallotGenerator.MODEL_IMPARTIAL_CULTURE,
+            BallotGenerator.MODEL_MALLOWS,
+            BallotGenerator.MODEL_PLACKETT_LUCE,
+            BallotGenerator.MODEL_SPATIAL,
+        ):
+            raise Exception("Unknown model specified", model)
+        self.candidates = list(candidates)
+        self.model = model
+        self.truncation_rate = truncation_rate
+        self.tie_rate = tie_rate
+        self.reference = [self.candidates.index(candidate) for candidate in (reference or self.candidates)]
+        self.dispersion = dispersion
+        self.weights = list(weights or [1.0] * len(self.candidates))
+        self.dimensions = dimensions
+        if numpy is not None:
+            self.random = numpy.random.RandomState(seed)
+            self.positions = self.random.random_sample((len(self.candidates), dimensions))
+        else:
+            self.random = random.Random(seed)
+            self.positions = [[self.random.random() for i in range(dimensions)] for candidate in self.candidates]
+
+    # Yields rankings as tuples of groups of tied candidates, most preferred first
+    def rankings(self, count):
+        for rows in self.batches(count):
+            for row in rows:
+                yield self.read_ranking(row)
+
+    # Yields one ballot per voter, in the given notation
+    def ballots(self, count, ballot_notation=BALLOT_NOTATION_GROUPING):
+        for ranking in self.rankings(count):
+            yield {"ballot": self.write_ballot(ranking, ballot_notation)}
+
+    # Returns the ballots of all the voters collapsed into weighted ballots, in
+    # order of first appearance. Each batch is collapsed before any ballot is
+    # built, so only distinct rankings ever become Python objects. Rankings
+    # that are written out as the same ballot, such as those that differ only
+    # in the order of tied candidates or beyond the first choice, are then
+    # collapsed together.
+    def aggregated_ballots(self, count, ballot_notation=BALLOT_NOTATION_GROUPING):
+        counts = {}
+        rows = []
+        for batch in self.batches(count):
+            if numpy is not None:
+                distinct, first, batch_counts = numpy.unique(
+                    self.encode_rows(batch), axis=0, return_index=True, return_counts=True
+                )
+                batch = [(tuple(batch[first[i]].tolist()), batch_counts[i]) for i in numpy.argsort(first)]
+            else:
+                batch = [(tuple(row), 1) for row in batch]
+            for row, row_count in batch:
+                if row not in counts:
+                    counts[row] = 0
+                    rows.append(row)
+                counts[row] += int(row_count)
+        aggregated = {}
+        ballots = []
+        for row in rows:
+            ballot = self.write_ballot(self.read_ranking(row), ballot_notation)
+            if ballot_notation == BallotGenerator.BALLOT_NOTATION_GROUPING:
+                key = tuple(frozenset(group) for group in ballot)
+            else:
+                key = canonical_ballot(ballot)
+            if key in aggregated:
+                aggregated[key]["count"] += counts[row]
+            else:
+                aggregated[key] = {"ballot": ballot, "count": counts[row]}
+                ballots.append(aggregated[key])
+        return ballots
+
+    # Each voter is generated as a row holding the order of the candidates, -1
+    # past the point of truncation, followed by a flag per adjacent pair that
+    # is set when the two are tied
+    def batches(self, count):
+        while count > 0:
+            batch = min(count, BATCH_SIZE)
+            if numpy is not None:
+                yield self.numpy_batch(batch)
+            else:
+                yield self.python_batch(batch)
+            count -= batch
+
+    # Packs each row into a single integer when that fits in 63 bits, which
+    # numpy deduplicates far faster than it does whole rows
+    def encode_rows(self, rows):
+        n = len(self.candidates)
+        bases = [n + 1] * n + [2] * (n - 1)
+        if reduce(lambda product, base: product * base, bases, 1) >= 2 ** 63:
+            return rows
+        powers = numpy.cumprod([1] + bases[:0:-1], dtype=numpy.int64)[::-1]
+        return numpy.dot(rows + numpy.array([1] * n + [0] * (n - 1)), powers)
+
+    def read_ranking(self, row):
+        n = len(self.candidates)
+        ranking = [[self.candidates[row[0]]]]
+        for position in range(1, n):
+            if row[position] < 0:
+                break
+            if row[n + position - 1]:
+                ranking[-1].append(self.candidates[row[position]])
+            else:
+                ranking.append([self.candidates[row[position]]])
+        return tuple(tuple(group) for group in ranking)
+
+    def write_ballot(self, ranking, ballot_notation):
+        if ballot_notation == BallotGenerator.BALLOT_NOTATION_GROUPING:
+            return [list(group) for group in ranking]
+        elif ballot_notation == BallotGenerator.BALLOT_NOTATION_RANKING:
+            return dict((candidate, rank + 1) for rank, group in enumerate(ranking) for candidate in group)
+        elif ballot_notation == BallotGenerator.BALLOT_NOTATION_RATING:
+            return dict((candidate, len(ranking) - rank) for rank, group in enumerate(ranking) for candidate in group)
+        elif ballot_notation == BallotGenerator.BALLOT_NOTATION_ORDERED:
+            return [candidate for group in ranking for candidate in group]
+        elif ballot_notation == BallotGenerator.BALLOT_NOTATION_SINGLE:
+            return ranking[0][0]
+        raise Exception("Unknown notation specified", ballot_notation)
+
+    def numpy_batch(self, count):
+        n = len(self.candidates)
+        if self.model == BallotGenerator.MODEL_IMPARTIAL_CULTURE:
+            orders = numpy.argsort(self.random.random_sample((count, n)), axis=1)
+        elif self.model == BallotGenerator.MODEL_MALLOWS:
+
+            # Insert the reference's candidates one at a time, the i-th at
+            # position j with probability proportional to phi^(i-j)
+            positions = numpy.zeros((count, n), dtype=int)
+            for i in range(n):
+                probabilities = self.dispersion ** numpy.arange(i, -1, -1, dtype=float)
+                cumulative = numpy.cumsum(probabilities / probabilities.sum())
+                inserted = numpy.minimum(numpy.searchsorted(cumulative, self.random.random_sample(count), side="right"), i)
+                positions[:, :i] += positions[:, :i] >= inserted[:, None]
+                positions[:, i] = inserted
+            orders = numpy.array(self.reference)[numpy.argsort(positions, axis=1)]
+        elif self.model == BallotGenerator.MODEL_PLACKETT_LUCE:
+
+            # Sorting log weights perturbed by Gumbel noise samples the
+            # Plackett-Luce model exactly
+            noise = -numpy.log(-numpy.log(self.random.random_sample((count, n))))
+            orders = numpy.argsort(-(numpy.log(self.weights) + noise), axis=1)
+        else:
+            voters = self.random.random_sample((count, 1, self.dimensions))
+            distances = ((voters - self.positions[None, :, :]) ** 2).sum(axis=2)
+            orders = numpy.argsort(distances, axis=1)
+        lengths = numpy.where(
+            self.random.random_sample(count) < self.truncation_rate,
+            self.random.randint(1, max(n, 2), size=count),
+            n,
+        )
+        ties = self.random.random_sample((count, max(n - 1, 0))) < self.tie_rate
+        kept = numpy.arange(n)[None, :] < lengths[:, None]
+        return numpy.hstack((numpy.where(kept, orders, -1), ties & kept[:, 1:]))
+
+    def python_batch(self, count):
+        n = len(self.candidates)
+        rows = []
+        for voter in range(count):
+            if self.model == BallotGenerator.MODEL_IMPARTIAL_CULTURE:
+                order = range(n)
+                self.random.shuffle(order)
+            elif self.model == BallotGenerator.MODEL_MALLOWS:
+                order = []
+                for i in range(n):
+                    probabilities = [self.dispersion ** (i - j) for j in range(i + 1)]
+                    cumulative = [sum(probabilities[:j + 1]) / sum(probabilities) for j in range(i + 1)]
+                    order.insert(min(bisect.bisect_right(cumulative, self.random.random()), i), self.reference[i])
+            elif self.model == BallotGenerator.MODEL_PLACKETT_LUCE:
+                remaining = range(n)
+                order = []
+                while remaining:
+                    pick = self.random.random() * sum(self.weights[candidate] for candidate in remaining)
+                    for candidate in remaining:
+                        pick -= self.weights[candidate]
+                        if pick < 0:
+                            break
+                    remaining.remove(candidate)
+                    order.append(candidate)
+            else:
+                voter_position = [self.random.random() for i in range(self.dimensions)]
+                order = sorted(range(n), key=lambda candidate: sum(
+                    (a - b) ** 2 for a, b in zip(voter_position, self.positions[candidate])
+                ))
+            length = self.random.randint(1, max(n - 1, 1)) if self.random.random() < self.truncation_rate else n
+            ties = [int(i < length and self.random.random() < self.tie_rate) for i in range(1, n)]
+            rows.append(order[:length] + [-1] * (n - length) + ties)
+        return rows
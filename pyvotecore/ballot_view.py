@@ -0,0 +1,61 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import types
+
+
+# This class presents a list of ballots without some of their candidates. The
+# ballots themselves are never modified, so the successive rounds of an
+# ordering can share them, each looking through a view that excludes the
+# candidates already placed. Ballots are filtered as they are iterated over,
+# and ballots left without any candidates are skipped.
+class BallotView(object):
+
+    #
+    def __init__(self, ballots, excluded_candidates=()):
+        self.ballots = ballots
+        self.excluded_candidates = frozenset(excluded_candidates)
+
+    #
+    def without(self, candidate):
+        return BallotView(self.ballots, self.excluded_candidates | set([candidate]))
+
+    #
+    def __iter__(self):
+        for ballot in self.ballots:
+            filtered_ballot = self.filter_ballot(ballot["ballot"], self.excluded_candidates)
+            if filtered_ballot:
+                yield {"ballot": filtered_ballot, "count": ballot.get("count", 1)}
+
+    # Removes candidates from a ballot in any notation: a dict of rankings or
+    # ratings, a list of candidates or groups of candidates, or a single
+    # candidate
+    @staticmethod
+    def filter_ballot(ballot, candidates):
+        if not candidates:
+            return ballot
+        if isinstance(ballot, types.DictType):
+            return dict((candidate, rating) for candidate, rating in ballot.iteritems() if candidate not in candidates)
+        if isinstance(ballot, (types.ListType, types.TupleType)):
+            filtered_ballot = []
+            for entry in ballot:
+                if isinstance(entry, (list, tuple, set, frozenset)):
+                    entry = type(entry)(candidate for candidate in entry if candidate not in candidates)
+                    if entry:
+                        filtered_ballot.append(entry)
+                elif entry not in candidates:
+                    filtered_ballot.append(entry)
+            return filtered_ballot
+        return [] if ballot in candidates else ballot
@@ -0,0 +1,55 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# This class maps candidates onto dense integer ids, so that the inner loops of
+# the voting systems can index lists and arrays instead of hashing candidates.
+# Ids are handed out in sorted candidate order, so sorting a tuple of ids
+# yields the same ordering as sorting the candidates themselves.
+class CandidateRegistry(object):
+
+    #
+    def __init__(self, candidates=()):
+        self.candidates = []
+        self.ids = {}
+        for candidate in sorted(candidates):
+            self.intern(candidate)
+
+    #
+    def intern(self, candidate):
+        if candidate not in self.ids:
+            self.ids[candidate] = len(self.candidates)
+            self.candidates.append(candidate)
+        return self.ids[candidate]
+
+    #
+    def id(self, candidate):
+        return self.ids[candidate]
+
+    #
+    def candidate(self, id):
+        return self.candidates[id]
+
+    #
+    def id_set(self, candidates):
+        return set(self.ids[candidate] for candidate in candidates)
+
+    #
+    def candidate_set(self, ids):
+        return set(self.candidates[id] for id in ids)
+
+    #
+    def __len__(self):
+        return len(self.candidates)
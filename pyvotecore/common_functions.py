@@ -1,3 +1,6 @@
+import json
+
+
 def matching_keys(dict, target_value):
     return set([
         key
@@ -19,3 +22,44 @@ def unique_permutations(xs):
             ts.remove(x)
             for ps in unique_permutations(ts):
                 yield [x] + ps
+
+
+# Reduces a ballot to a hashable form, so that ballots expressing the same
+# preferences compare equal regardless of their container types
+def canonical_ballot(ballot):
+    if isinstance(ballot, dict):
+        return frozenset(
+            (candidate, canonical_ballot(preference))
+            for candidate, preference in ballot.iteritems()
+        )
+    elif isinstance(ballot, (list, tuple)):
+        return tuple(canonical_ballot(preference) for preference in ballot)
+    return ballot
+
+
+# Collapses identical ballots into a single weighted ballot, returning the
+# distinct ballots in order of first appearance along with the number of
+# ballot entries consumed
+def aggregate_ballots(ballots):
+    aggregated = {}
+    distinct_ballots = []
+    entries = 0
+    for ballot in ballots:
+        entries += 1
+        count = ballot.get("count", 1)
+        key = canonical_ballot(ballot["ballot"])
+        if key in aggregated:
+            aggregated[key]["count"] += count
+        else:
+            aggregated[key] = {"ballot": ballot["ballot"], "count": count}
+            distinct_ballots.append(aggregated[key])
+    return distinct_ballots, entries
+
+
+# Streams ballots from an iterable of lines, such as an open file, holding one
+# JSON encoded ballot per line
+def read_ballots(lines):
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
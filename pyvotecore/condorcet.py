@@ -15,48 +15,101 @@
 
 from abc import ABCMeta, abstractmethod
 from abstract_classes import SingleWinnerVotingSystem
-from pygraph.classes.digraph import digraph
+from candidate_registry import CandidateRegistry
+from stats import Stats, Instrumented
+from common_functions import aggregate_ballots, canonical_ballot
+from digraph import Digraph
 import itertools
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
-class CondorcetHelper(object):
+class CondorcetHelper(Instrumented):
 
     BALLOT_NOTATION_GROUPING = 0
     BALLOT_NOTATION_RANKING = 1
     BALLOT_NOTATION_RATING = 2
 
     def standardize_ballots(self, ballots, ballot_notation):
+        with self.stats_phase("standardize"):
 
-        self.ballots = ballots
-        if ballot_notation == CondorcetHelper.BALLOT_NOTATION_GROUPING:
-            for ballot in self.ballots:
-                ballot["ballot"].reverse()
-                new_ballot = {}
-                r = 0
-                for rank in ballot["ballot"]:
-                    r += 1
-                    for candidate in rank:
-                        new_ballot[candidate] = r
-                ballot["ballot"] = new_ballot
-        elif ballot_notation == CondorcetHelper.BALLOT_NOTATION_RANKING:
+            # Convert each ballot as it streams in, collapsing identical ballots
+            if ballot_notation not in (
+                CondorcetHelper.BALLOT_NOTATION_GROUPING,
+                CondorcetHelper.BALLOT_NOTATION_RANKING,
+                CondorcetHelper.BALLOT_NOTATION_RATING,
+                None,
+            ):
+                raise Exception("Unknown notation specified", ballot_notation)
+            self.ballots, self.ballot_entries = aggregate_ballots(
+                {"ballot": self.standardize_ballot(ballot["ballot"], ballot_notation), "count": ballot.get("count", 1)}
+                for ballot in ballots
+            )
+
+            self.ballot_notation = ballot_notation
+
+            self.candidates = set()
             for ballot in self.ballots:
-                for candidate, rating in ballot["ballot"].iteritems():
-                    ballot["ballot"][candidate] = -float(rating)
-        elif ballot_notation == CondorcetHelper.BALLOT_NOTATION_RATING or ballot_notation is None:
+                self.candidates |= set(ballot["ballot"].keys())
+            self.registry = CandidateRegistry(self.candidates)
+            self.ballot_ranks = None
+
             for ballot in self.ballots:
-                for candidate, rating in ballot["ballot"].iteritems():
-                    ballot["ballot"][candidate] = float(rating)
-        else:
-            raise Exception("Unknown notation specified", ballot_notation)
+                self.fill_ballot(ballot["ballot"], self.candidates)
+            self.index_ballots()
 
-        self.candidates = set()
+    # Merges the ballots that only became identical once filled in, and indexes
+    # the position of each ballot by its canonical form, so that later updates
+    # only need to look up the ballots they touch
+    def index_ballots(self):
+        ballots = []
+        self.ballot_keys = []
+        self.ballot_index = {}
         for ballot in self.ballots:
-            self.candidates |= set(ballot["ballot"].keys())
+            key = canonical_ballot(ballot["ballot"])
+            if key in self.ballot_index:
+                ballots[self.ballot_index[key]]["count"] += ballot["count"]
+            else:
+                self.ballot_index[key] = len(ballots)
+                self.ballot_keys.append(key)
+                ballots.append(ballot)
+        self.ballots = ballots
 
-        for ballot in self.ballots:
-            lowest_preference = min(ballot["ballot"].values()) - 1
-            for candidate in self.candidates - set(ballot["ballot"].keys()):
-                ballot["ballot"][candidate] = lowest_preference
+    # Ranks the candidates a ballot leaves out below those it lists
+    @staticmethod
+    def fill_ballot(ballot, candidates):
+        lowest_preference = min(ballot.values()) - 1
+        for candidate in candidates - set(ballot.keys()):
+            ballot[candidate] = lowest_preference
+        return ballot
+
+    # Converts a single ballot into a rating of its candidates, without
+    # modifying the original
+    @staticmethod
+    def standardize_ballot(ballot, ballot_notation):
+        if ballot_notation == CondorcetHelper.BALLOT_NOTATION_GROUPING:
+            new_ballot = {}
+            r = 0
+            for rank in reversed(ballot):
+                r += 1
+                for candidate in rank:
+                    new_ballot[candidate] = r
+            return new_ballot
+        elif ballot_notation == CondorcetHelper.BALLOT_NOTATION_RANKING:
+            return dict((candidate, -float(rating)) for candidate, rating in ballot.iteritems())
+        else:
+            return dict((candidate, float(rating)) for candidate, rating in ballot.iteritems())
+
+    # Lists each ballot's preferences indexed by candidate id, alongside its count
+    def ranked_ballots(self):
+        if self.ballot_ranks is None:
+            self.ballot_ranks = [
+                ([ballot["ballot"][candidate] for candidate in self.registry.candidates], ballot["count"])
+                for ballot in self.ballots
+            ]
+        return self.ballot_ranks
 
     def graph_winner(self):
         losing_candidates = set([edge[1] for edge in self.graph.edges()])
@@ -71,14 +124,39 @@ class CondorcetHelper(object):
 
     @staticmethod
     def ballots_into_graph(candidates, ballots):
-        graph = digraph()
-        graph.add_nodes(candidates)
-        for pair in itertools.permutations(candidates, 2):
-            graph.add_edge(pair, sum([
-                ballot["count"]
+        return CondorcetHelper.matrix_into_graph(*CondorcetHelper.ballots_into_matrix(candidates, ballots))
+
+    # Tallies the standardized ballots into a pairwise preference matrix, where
+    # matrix[i][j] is the number of votes preferring candidates[i] over
+    # candidates[j]. If NumPy is available, the ballots are encoded as a rank
+    # array and a count vector and tallied one candidate row at a time.
+    @staticmethod
+    def ballots_into_matrix(candidates, ballots):
+        candidates = list(candidates)
+        if numpy is not None and len(ballots) > 0:
+            ranks = numpy.array([
+                [ballot["ballot"][candidate] for candidate in candidates]
                 for ballot in ballots
-                if ballot["ballot"][pair[0]] > ballot["ballot"][pair[1]]
-            ]))
+            ])
+            counts = numpy.array([ballot["count"] for ballot in ballots])
+            matrix = [
+                numpy.dot(counts, ranks[:, i, None] > ranks).tolist()
+                for i in range(len(candidates))
+            ]
+        else:
+            matrix = [[0] * len(candidates) for candidate in candidates]
+            for ballot in ballots:
+                ranks = [ballot["ballot"][candidate] for candidate in candidates]
+                for i, j in itertools.permutations(range(len(candidates)), 2):
+                    if ranks[i] > ranks[j]:
+                        matrix[i][j] += ballot["count"]
+        return candidates, matrix
+
+    @staticmethod
+    def matrix_into_graph(candidates, matrix):
+        graph = Digraph(candidates)
+        for i, j in itertools.permutations(range(len(candidates)), 2):
+            graph.add_edge((candidates[i], candidates[j]), matrix[i][j])
         return graph
 
     @staticmethod
@@ -98,24 +176,121 @@ class CondorcetHelper(object):
             if weights[1] >= weights[0]:
                 graph.del_edge(pairs[0])
 
-# This class determines the Condorcet winner if one exists.
 
+# This class lets a Condorcet system bypass ballots and use preference tallies
+# instead, given as a dict mapping (winner, loser) edges onto their weights.
+class ByGraphHelper(object):
+
+    def standardize_ballots(self, ballots, ballot_notation):
+        self.ballots = []
+        self.candidates = set([edge[0] for edge, weight in self.edges.iteritems()]) | set([edge[1] for edge, weight in self.edges.iteritems()])
+        self.registry = CandidateRegistry(self.candidates)
+
+    def ballots_into_matrix(self, candidates, ballots):
+        return self.edges_into_matrix(self.registry, self.edges)
+
+    # Preference tallies cannot be traced back to ballots, so there are none
+    # to add or remove
+    def update_ballots(self, ballots, sign):
+        raise Exception("Ballots cannot be added to or removed from an election decided by preference tallies")
+
+    # Arranges the preference tallies into a pairwise matrix, where missing
+    # edges count as no preference at all
+    @staticmethod
+    def edges_into_matrix(registry, edges):
+        matrix = [[0] * len(registry) for candidate in registry.candidates]
+        for edge, weight in edges.iteritems():
+            matrix[registry.id(edge[0])][registry.id(edge[1])] = weight
+        return registry.candidates, matrix
 
+
+# This class determines the Condorcet winner if one exists.
 class CondorcetSystem(SingleWinnerVotingSystem, CondorcetHelper):
 
     __metaclass__ = ABCMeta
 
     @abstractmethod
-    def __init__(self, ballots, tie_breaker=None, ballot_notation=None):
+    def __init__(self, ballots, tie_breaker=None, ballot_notation=None, stats=None):
+        self.stats = Stats.coerce(stats)
         self.standardize_ballots(ballots, ballot_notation)
-        super(CondorcetSystem, self).__init__(self.ballots, tie_breaker=tie_breaker)
+        super(CondorcetSystem, self).__init__(self.ballots, tie_breaker=tie_breaker, stats=self.stats)
 
     def calculate_results(self):
-        self.graph = self.ballots_into_graph(self.candidates, self.ballots)
-        self.pairs = self.edge_weights(self.graph)
-        self.remove_weak_edges(self.graph)
-        self.strong_pairs = self.edge_weights(self.graph)
-        self.graph_winner()
+        with self.stats_phase("tally"):
+            self.matrix_candidates, self.matrix = self.ballots_into_matrix(self.registry.candidates, self.ballots)
+        self.calculate_results_from_matrix()
+
+    def calculate_results_from_matrix(self):
+        with self.stats_phase("graph"):
+            self.graph = self.matrix_into_graph(self.matrix_candidates, self.matrix)
+            self.pairs = self.edge_weights(self.graph)
+            self.remove_weak_edges(self.graph)
+            self.strong_pairs = self.edge_weights(self.graph)
+        with self.stats_phase("winner"):
+            self.graph_winner()
+
+    # Adds ballots to the election, tallying only the new ballots into the
+    # pairwise matrix before deciding the winner again
+    def add_ballots(self, ballots):
+        self.update_ballots(ballots, 1)
+
+    # Voids ballots previously counted in the election
+    def remove_ballots(self, ballots):
+        self.update_ballots(ballots, -1)
+
+    def update_ballots(self, ballots, sign):
+
+        # Standardize the ballots the same way as the ones already counted,
+        # merging those that only become identical once filled in
+        ballots, entries = aggregate_ballots(
+            {"ballot": self.standardize_ballot(ballot["ballot"], self.ballot_notation), "count": ballot.get("count", 1)}
+            for ballot in ballots
+        )
+        for ballot in ballots:
+            unknown_candidates = set(ballot["ballot"].keys()) - self.candidates
+            if unknown_candidates:
+                raise Exception("Ballot contains unknown candidates", unknown_candidates)
+            self.fill_ballot(ballot["ballot"], self.candidates)
+        ballots = aggregate_ballots(ballots)[0]
+        keys = [canonical_ballot(ballot["ballot"]) for ballot in ballots]
+        if sign < 0:
+            for key, ballot in zip(keys, ballots):
+                if key not in self.ballot_index or self.ballots[self.ballot_index[key]]["count"] < ballot["count"]:
+                    raise Exception("Ballot to remove was not counted", ballot)
+
+        # Update the counted ballots, leaving the merged ballots untouched for
+        # the tally below. Ballots whose count runs out are swapped with the
+        # last ballot and dropped.
+        for key, ballot in zip(keys, ballots):
+            if key in self.ballot_index:
+                position = self.ballot_index[key]
+                self.ballots[position]["count"] += sign * ballot["count"]
+                if self.ballots[position]["count"] <= 0:
+                    del self.ballot_index[key]
+                    last_ballot, last_key = self.ballots.pop(), self.ballot_keys.pop()
+                    if last_key != key:
+                        self.ballots[position], self.ballot_keys[position] = last_ballot, last_key
+                        self.ballot_index[last_key] = position
+            else:
+                self.ballot_index[key] = len(self.ballots)
+                self.ballot_keys.append(key)
+                self.ballots.append(dict(ballot))
+        self.ballot_entries += sign * entries
+        self.compression_ratio = float(self.ballot_entries) / len(self.ballots) if self.ballots else 1.0
+        self.ballot_ranks = None
+
+        # Update the matrix and decide the winner again
+        with self.stats_phase("tally"):
+            candidates, matrix = self.ballots_into_matrix(self.matrix_candidates, ballots)
+            for i in range(len(candidates)):
+                for j in range(len(candidates)):
+                    self.matrix[i][j] += sign * matrix[i][j]
+        for attribute in ('winner', 'tied_winners', 'actions', 'rounds', 'ranking', 'path_strengths'):
+            if hasattr(self, attribute):
+                delattr(self, attribute)
+        if self.tie_breaker is not None:
+            self.tie_breaker.ties_broken = False
+        self.calculate(self.calculate_results_from_matrix)
 
     def as_dict(self):
         data = super(CondorcetSystem, self).as_dict()
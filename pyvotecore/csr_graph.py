@@ -0,0 +1,176 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# This class stores a weighted directed graph in compressed sparse row form:
+# the edges leaving node i are those from offsets[i] up to offsets[i + 1] in
+# the targets and weights arrays. Nodes are the integers from 0 up to the
+# number of nodes. Nodes and edges are deleted by clearing a flag rather than
+# by moving the arrays around, and an edge only counts while both its ends do.
+from digraph import Digraph
+from array import array
+
+
+class CSRGraph(object):
+
+    #
+    def __init__(self, node_count, sources, targets, weights):
+        self.offsets = array('l', [0] * (node_count + 1))
+        for source in sources:
+            self.offsets[source + 1] += 1
+        for i in range(node_count):
+            self.offsets[i + 1] += self.offsets[i]
+        self.targets = array('l', [0] * len(targets))
+        self.weights = array('d', [0.0] * len(weights))
+        position = self.offsets[:-1]
+        for source, target, weight in zip(sources, targets, weights):
+            self.targets[position[source]] = target
+            self.weights[position[source]] = weight
+            position[source] += 1
+        self.node_alive = bytearray([1]) * node_count
+        self.edge_alive = bytearray([1]) * len(targets)
+
+    #
+    def nodes(self):
+        return [node for node in range(len(self.node_alive)) if self.node_alive[node]]
+
+    #
+    def edges(self):
+        return [(source, self.targets[i]) for source, i in self.live_edges()]
+
+    #
+    def edge_weight(self, edge):
+        source, target = edge
+        for i in range(self.offsets[source], self.offsets[source + 1]):
+            if self.targets[i] == target and self.edge_alive[i]:
+                return self.weights[i]
+
+    #
+    def del_node(self, node):
+        self.node_alive[node] = 0
+
+    #
+    def del_edge(self, edge):
+        source, target = edge
+        for i in range(self.offsets[source], self.offsets[source + 1]):
+            if self.targets[i] == target:
+                self.edge_alive[i] = 0
+
+    # Yields the source and index of every edge still in the graph
+    def live_edges(self):
+        offsets, targets, node_alive, edge_alive = self.offsets, self.targets, self.node_alive, self.edge_alive
+        for source in range(len(node_alive)):
+            if node_alive[source]:
+                for i in range(offsets[source], offsets[source + 1]):
+                    if edge_alive[i] and node_alive[targets[i]]:
+                        yield source, i
+
+    # Lists the nodes that no edge points to
+    def unbeaten_nodes(self):
+        beaten = bytearray(len(self.node_alive))
+        for source, i in self.live_edges():
+            beaten[self.targets[i]] = 1
+        return set(node for node in self.nodes() if not beaten[node])
+
+    # Labels each node with its strongly connected component, using an
+    # iterative version of Tarjan's algorithm. Deleted nodes are labelled -1.
+    def strongly_connected_components(self):
+        offsets, targets, node_alive, edge_alive = self.offsets, self.targets, self.node_alive, self.edge_alive
+        node_count = len(node_alive)
+        index = [-1] * node_count
+        low = [0] * node_count
+        component = [-1] * node_count
+        on_stack = bytearray(node_count)
+        stack = []
+        counter = 0
+        components = 0
+        for root in range(node_count):
+            if not node_alive[root] or index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, offsets[root]]]
+            while work:
+                node, i = work[-1]
+                end = offsets[node + 1]
+                while i < end and not (edge_alive[i] and node_alive[targets[i]]):
+                    i += 1
+                if i < end:
+                    work[-1][1] = i + 1
+                    target = targets[i]
+                    if index[target] == -1:
+                        index[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append([target, offsets[target]])
+                    elif on_stack[target] and index[target] < low[node]:
+                        low[node] = index[target]
+                    continue
+                work.pop()
+                if work and low[node] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node]
+                if low[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component[member] = components
+                        if member == node:
+                            break
+                    components += 1
+        return component
+
+    # Whittles the graph down with the Schwartz set heuristic. A node can be
+    # reached from a node outside its own cycle exactly when its strongly
+    # connected component has an edge coming in from another component. Such
+    # nodes are removed, or if there are none, the weakest edges are. Returns
+    # the actions taken.
+    def schwartz_set_heuristic(self):
+        actions = []
+        while True:
+            component = self.strongly_connected_components()
+            dominated = set()
+            minimum = None
+            for source, i in self.live_edges():
+                target = self.targets[i]
+                if component[source] != component[target]:
+                    dominated.add(component[target])
+                if minimum is None or self.weights[i] < minimum:
+                    minimum = self.weights[i]
+            if minimum is None:
+                return actions
+
+            # Remove nodes at the end of non-cycle paths
+            if dominated:
+                nodes = set(node for node in self.nodes() if component[node] in dominated)
+                actions.append({'nodes': nodes})
+                for node in nodes:
+                    self.node_alive[node] = 0
+
+            # If none exist, remove the weakest edges
+            else:
+                weakest = [(source, i) for source, i in self.live_edges() if self.weights[i] == minimum]
+                actions.append({'edges': set((source, self.targets[i]) for source, i in weakest)})
+                for source, i in weakest:
+                    self.edge_alive[i] = 0
+
+    # Copies what remains of the graph into an adjacency matrix Digraph,
+    # optionally relabelling its nodes
+    def as_digraph(self, label=lambda node: node):
+        graph = Digraph([label(node) for node in self.nodes()])
+        for source, i in self.live_edges():
+            graph.add_edge((label(source), label(self.targets[i])), self.weights[i])
+        return graph
@@ -0,0 +1,187 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# This class stores a weighted directed graph as an adjacency matrix, where
+# weights[i][j] is the weight of the edge from the ith node to the jth, or None
+# if there is no such edge. Nodes may be any hashable value and are numbered in
+# the order they were added. Deleted nodes keep their number, and their row
+# and column are cleared. It provides the graph algorithms the voting systems
+# need: reachability, strongly connected components and maximum flow.
+from collections import deque
+
+
+class Digraph(object):
+
+    #
+    def __init__(self, nodes=()):
+        self.ids = {}
+        self.labels = []
+        self.node_alive = bytearray()
+        self.weights = []
+        self.edge_count = 0
+        self.add_nodes(nodes)
+
+    #
+    def add_node(self, node):
+        self.add_nodes([node])
+
+    #
+    def add_nodes(self, nodes):
+        nodes = list(nodes)
+        for node in nodes:
+            if node in self.ids:
+                raise Exception("Node already in graph", node)
+            self.ids[node] = len(self.labels)
+            self.labels.append(node)
+        self.node_alive.extend([1] * len(nodes))
+        for row in self.weights:
+            row.extend([None] * len(nodes))
+        self.weights.extend([None] * len(self.labels) for node in nodes)
+
+    #
+    def del_node(self, node):
+        i = self.ids.pop(node)
+        self.node_alive[i] = 0
+        for j in range(len(self.labels)):
+            for edge in ((i, j), (j, i)):
+                if self.weights[edge[0]][edge[1]] is not None:
+                    self.weights[edge[0]][edge[1]] = None
+                    self.edge_count -= 1
+
+    #
+    def has_node(self, node):
+        return node in self.ids
+
+    #
+    def nodes(self):
+        return [self.labels[i] for i in range(len(self.labels)) if self.node_alive[i]]
+
+    #
+    def add_edge(self, edge, weight=1):
+        source, target = self.ids[edge[0]], self.ids[edge[1]]
+        if self.weights[source][target] is not None:
+            raise Exception("Edge already in graph", edge)
+        self.weights[source][target] = weight
+        self.edge_count += 1
+
+    #
+    def del_edge(self, edge):
+        source, target = self.ids[edge[0]], self.ids[edge[1]]
+        if self.weights[source][target] is None:
+            raise Exception("Edge not in graph", edge)
+        self.weights[source][target] = None
+        self.edge_count -= 1
+
+    #
+    def has_edge(self, edge):
+        return edge[0] in self.ids and edge[1] in self.ids and self.weights[self.ids[edge[0]]][self.ids[edge[1]]] is not None
+
+    #
+    def edge_weight(self, edge):
+        return self.weights[self.ids[edge[0]]][self.ids[edge[1]]]
+
+    #
+    def set_edge_weight(self, edge, weight):
+        source, target = self.ids[edge[0]], self.ids[edge[1]]
+        if self.weights[source][target] is None:
+            raise Exception("Edge not in graph", edge)
+        self.weights[source][target] = weight
+
+    #
+    def edges(self):
+        labels = self.labels
+        return [
+            (labels[i], labels[j])
+            for i, row in enumerate(self.weights)
+            for j, weight in enumerate(row)
+            if weight is not None
+        ]
+
+    # Lists the nodes each node can reach, itself included, as bitmasks over
+    # the node numbers. The transitive closure is built with Warshall's
+    # algorithm, one row of the matrix at a time.
+    def reachability(self):
+        reach = [
+            (1 << i) | sum(1 << j for j, weight in enumerate(row) if weight is not None)
+            for i, row in enumerate(self.weights)
+        ]
+        for k in range(len(reach)):
+            bit = 1 << k
+            reach_k = reach[k]
+            for i in range(len(reach)):
+                if reach[i] & bit:
+                    reach[i] |= reach_k
+        return reach
+
+    # Maps each node onto the set of nodes it can reach, itself included
+    def accessibility(self):
+        reach = self.reachability()
+        return dict((self.labels[i], self.bitmask_nodes(reach[i])) for i in self.node_ids())
+
+    # Maps each node onto the set of nodes in its strongly connected component,
+    # i.e. those it can reach and be reached from
+    def mutual_accessibility(self):
+        reach = self.reachability()
+        return dict(
+            (self.labels[i], self.bitmask_nodes(sum(1 << j for j in self.node_ids() if reach[i] >> j & 1 and reach[j] >> i & 1)))
+            for i in self.node_ids()
+        )
+
+    # Finds the value of the maximum flow from the source to the sink, taking
+    # the edge weights as capacities, with the Edmonds-Karp algorithm
+    def maximum_flow(self, source, sink):
+        source, sink = self.ids[source], self.ids[sink]
+        size = len(self.labels)
+        residual = [[weight or 0 for weight in row] for row in self.weights]
+        neighbors = [
+            [j for j in range(size) if self.weights[i][j] is not None or self.weights[j][i] is not None]
+            for i in range(size)
+        ]
+        total = 0
+        while True:
+
+            # Find the shortest path with room left on every edge
+            parent = [-1] * size
+            parent[source] = source
+            queue = deque([source])
+            while queue and parent[sink] == -1:
+                i = queue.popleft()
+                for j in neighbors[i]:
+                    if parent[j] == -1 and residual[i][j] > 0:
+                        parent[j] = i
+                        queue.append(j)
+            if parent[sink] == -1:
+                return total
+
+            # Push as much as the path allows along it
+            path = []
+            j = sink
+            while j != source:
+                path.append((parent[j], j))
+                j = parent[j]
+            flow = min(residual[i][j] for i, j in path)
+            for i, j in path:
+                residual[i][j] -= flow
+                residual[j][i] += flow
+            total += flow
+
+    #
+    def node_ids(self):
+        return [i for i in range(len(self.labels)) if self.node_alive[i]]
+
+    #
+    def bitmask_nodes(self, bitmask):
+        return set(self.labels[i] for i in range(len(self.labels)) if bitmask >> i & 1)
@@ -0,0 +1,73 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# This module spreads the independent vote management strength calculations of
+# SchulzeSTV and SchulzePR across a pool of threads or processes. Each worker
+# receives the ballots once, when the pool starts, and keeps its own copy of the
+# vote management graph. Results come back in task order, so they match those
+# of a serial run exactly.
+from schulze_helper import SchulzeHelper
+from multiprocessing.pool import ThreadPool
+import multiprocessing
+import threading
+
+EXECUTOR_SERIAL = "serial"
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+worker = threading.local()
+
+
+def initialize_worker(registry, ballot_ranks, strength_solver):
+    worker.helper = SchulzeHelper()
+    worker.helper.strength_solver = strength_solver
+    worker.helper.registry = registry
+    worker.helper.ballot_ranks = ballot_ranks
+    worker.helper.required_winners = None
+
+
+def worker_strength(task):
+    return worker.helper.vote_management_strength(*task)
+
+
+class StrengthPool(object):
+
+    # Tasks are (required_winners, candidate, other_candidates) tuples, each
+    # evaluated by SchulzeHelper.vote_management_strength
+    def __init__(self, helper, executor=None, processes=None):
+        self.helper = helper
+        self.processes = processes or multiprocessing.cpu_count()
+        initargs = (helper.registry, helper.ranked_ballots(), helper.strength_solver)
+        if executor is None or executor == EXECUTOR_SERIAL:
+            self.pool = None
+        elif executor == EXECUTOR_THREAD:
+            self.pool = ThreadPool(self.processes, initialize_worker, initargs)
+        elif executor == EXECUTOR_PROCESS:
+            self.pool = multiprocessing.Pool(self.processes, initialize_worker, initargs)
+        else:
+            raise Exception("Unknown executor specified", executor)
+
+    def map(self, tasks):
+        self.helper.stats_count("vote_managements", len(tasks))
+        with self.helper.stats_phase("vote_management"):
+            if self.pool is None:
+                return [self.helper.vote_management_strength(*task) for task in tasks]
+            chunksize = max(1, len(tasks) // (self.processes * 4))
+            return self.pool.map(worker_strength, tasks, chunksize)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
@@ -4,8 +4,8 @@ from stv import STV
 
 class IRV(AbstractSingleWinnerVotingSystem):
 
-    def __init__(self, ballots, tie_breaker=None):
-        super(IRV, self).__init__(ballots, STV, tie_breaker=tie_breaker)
+    def __init__(self, ballots, tie_breaker=None, stats=None):
+        super(IRV, self).__init__(ballots, STV, tie_breaker=tie_breaker, stats=stats)
 
     def calculate_results(self):
         super(IRV, self).calculate_results()
@@ -0,0 +1,99 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from condorcet import CondorcetHelper
+from common_functions import aggregate_ballots
+import itertools
+
+
+# This class tallies ballots into pairwise preference counts, such that the
+# tallies of separate shards of ballots (precincts, file chunks, workers) can
+# be merged into the tally of all of them. Merging is associative and
+# commutative, so shards can be combined in any grouping and order.
+#
+# A Condorcet ballot prefers each candidate it lists over every candidate it
+# leaves out, including candidates that only appear in other shards. Each
+# candidate's mentions, the number of votes on ballots that list it, are kept
+# so that a merge can credit those preferences over the other shard's new
+# candidates.
+class PairwiseMatrix(object):
+
+    #
+    def __init__(self, ballots=(), ballot_notation=None):
+        self.candidates = set()
+        self.pairs = {}
+        self.mentions = {}
+        self.add_ballots(ballots, ballot_notation)
+
+    #
+    def add_ballots(self, ballots, ballot_notation=None):
+        ballots, entries = aggregate_ballots(ballots)
+        for ballot in ballots:
+            self.update(self.from_ballot(CondorcetHelper.standardize_ballot(ballot["ballot"], ballot_notation), ballot["count"]))
+        return self
+
+    # Tallies a single standardized ballot
+    @staticmethod
+    def from_ballot(ballot, count):
+        matrix = PairwiseMatrix()
+        matrix.candidates = set(ballot.keys())
+        matrix.mentions = dict.fromkeys(matrix.candidates, count)
+        for winner, loser in itertools.permutations(matrix.candidates, 2):
+            if ballot[winner] > ballot[loser]:
+                matrix.pairs[(winner, loser)] = count
+        return matrix
+
+    # Merges another tally into this one
+    def update(self, other):
+        for candidate in self.candidates - other.candidates:
+            for other_candidate in other.candidates - self.candidates:
+                self.add_pair((candidate, other_candidate), self.mentions[candidate])
+                self.add_pair((other_candidate, candidate), other.mentions[other_candidate])
+        for candidate in self.candidates & other.candidates:
+            for other_candidate in other.candidates - self.candidates:
+                self.add_pair((candidate, other_candidate), self.mentions[candidate])
+            for other_candidate in self.candidates - other.candidates:
+                self.add_pair((candidate, other_candidate), other.mentions[candidate])
+        for pair, weight in other.pairs.iteritems():
+            self.add_pair(pair, weight)
+        for candidate, mentions in other.mentions.iteritems():
+            self.mentions[candidate] = self.mentions.get(candidate, 0) + mentions
+        self.candidates |= other.candidates
+        return self
+
+    #
+    def add_pair(self, pair, weight):
+        if weight:
+            self.pairs[pair] = self.pairs.get(pair, 0) + weight
+
+    #
+    def copy(self):
+        matrix = PairwiseMatrix()
+        matrix.candidates = set(self.candidates)
+        matrix.pairs = dict(self.pairs)
+        matrix.mentions = dict(self.mentions)
+        return matrix
+
+    #
+    def __add__(self, other):
+        return self.copy().update(other)
+
+    # Lists the weight of every ordered pair of candidates, in the form taken
+    # by SchulzeMethodByGraph, SchulzeNPRByGraph and RankedPairsByGraph
+    def edges(self):
+        return dict(
+            (pair, self.pairs.get(pair, 0))
+            for pair in itertools.permutations(self.candidates, 2)
+        )
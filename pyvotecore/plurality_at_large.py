@@ -21,8 +21,8 @@ import copy
 
 class PluralityAtLarge(MultipleWinnerVotingSystem):
 
-    def __init__(self, ballots, tie_breaker=None, required_winners=1):
-        super(PluralityAtLarge, self).__init__(ballots, tie_breaker=tie_breaker, required_winners=required_winners)
+    def __init__(self, ballots, tie_breaker=None, required_winners=1, stats=None):
+        super(PluralityAtLarge, self).__init__(ballots, tie_breaker=tie_breaker, required_winners=required_winners, stats=stats)
 
     def calculate_results(self):
 
@@ -13,50 +13,53 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from condorcet import CondorcetSystem, CondorcetHelper
-from pygraph.classes.digraph import digraph
-from pygraph.algorithms.cycles import find_cycle
-from common_functions import matching_keys
-from copy import deepcopy
+from condorcet import CondorcetSystem, CondorcetHelper, ByGraphHelper
+from digraph import Digraph
+import itertools
 
 
-# This class implements the Schulze Method (aka the beatpath method)
+# This class implements the Ranked Pairs method (aka Tideman's method)
 class RankedPairs(CondorcetSystem, CondorcetHelper):
 
-    def __init__(self, ballots, tie_breaker=None, ballot_notation=None):
-        super(RankedPairs, self).__init__(ballots, tie_breaker=tie_breaker, ballot_notation=ballot_notation)
+    def __init__(self, ballots, tie_breaker=None, ballot_notation=None, stats=None):
+        super(RankedPairs, self).__init__(ballots, tie_breaker=tie_breaker, ballot_notation=ballot_notation, stats=stats)
 
     def condorcet_completion_method(self):
 
-        # Initialize the candidate graph
+        # Initialize the candidate graph, noting which candidates each
+        # candidate can reach through the pairs locked in so far
         self.rounds = []
-        graph = digraph()
-        graph.add_nodes(self.candidates)
+        graph = Digraph(self.candidates)
+        reachable = dict((candidate, set([candidate])) for candidate in self.candidates)
 
-        # Loop until we've considered all possible pairs
-        remaining_strong_pairs = deepcopy(self.strong_pairs)
-        while len(remaining_strong_pairs) > 0:
-            r = {}
+        # Consider the pairs from strongest to weakest
+        ordered_pairs = sorted(self.strong_pairs.iteritems(), key=lambda item: item[1], reverse=True)
+        for strength, pairs in itertools.groupby(ordered_pairs, key=lambda item: item[1]):
+            remaining_pairs = set(pair for pair, strength in pairs)
+            while len(remaining_pairs) > 0:
+                r = {}
 
-            # Find the strongest pair
-            largest_strength = max(remaining_strong_pairs.values())
-            strongest_pairs = matching_keys(remaining_strong_pairs, largest_strength)
-            if len(strongest_pairs) > 1:
-                r["tied_pairs"] = strongest_pairs
-                strongest_pair = self.break_ties(strongest_pairs)
-            else:
-                strongest_pair = list(strongest_pairs)[0]
-            r["pair"] = strongest_pair
+                # Find the strongest pair
+                if len(remaining_pairs) > 1:
+                    r["tied_pairs"] = set(remaining_pairs)
+                    strongest_pair = self.break_ties(remaining_pairs)
+                else:
+                    strongest_pair = list(remaining_pairs)[0]
+                r["pair"] = strongest_pair
 
-            # If the pair would add a cycle, skip it
-            graph.add_edge(strongest_pair)
-            if len(find_cycle(graph)) > 0:
-                r["action"] = "skipped"
-                graph.del_edge(strongest_pair)
-            else:
-                r["action"] = "added"
-            del remaining_strong_pairs[strongest_pair]
-            self.rounds.append(r)
+                # If the pair would add a cycle, skip it
+                winner, loser = strongest_pair
+                self.stats_count("cycle_checks")
+                if winner in reachable[loser]:
+                    r["action"] = "skipped"
+                else:
+                    r["action"] = "added"
+                    graph.add_edge(strongest_pair)
+                    for candidate in self.candidates:
+                        if winner in reachable[candidate]:
+                            reachable[candidate] |= reachable[loser]
+                remaining_pairs.remove(strongest_pair)
+                self.rounds.append(r)
 
         self.old_graph = self.graph
         self.graph = graph
@@ -67,3 +70,11 @@ class RankedPairs(CondorcetSystem, CondorcetHelper):
         if hasattr(self, 'rounds'):
             data["rounds"] = self.rounds
         return data
+
+
+# This class provides Ranked Pairs results, but bypasses ballots and uses preference tallies instead.
+class RankedPairsByGraph(ByGraphHelper, RankedPairs):
+
+    def __init__(self, edges, tie_breaker=None, ballot_notation=None, stats=None):
+        self.edges = edges
+        super(RankedPairsByGraph, self).__init__([], tie_breaker=tie_breaker, ballot_notation=ballot_notation, stats=stats)
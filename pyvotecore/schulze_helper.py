@@ -13,17 +13,25 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from pygraph.algorithms.accessibility import accessibility, mutual_accessibility
-from pygraph.classes.digraph import digraph
-from pygraph.algorithms.minmax import maximum_flow
 from condorcet import CondorcetHelper
+from digraph import Digraph
 from common_functions import matching_keys, unique_permutations
+from profile_cache import ProfileCache
+from tie_breaker import TieBreaker
+import itertools
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 PREFERRED_LESS = 1
 PREFERRED_SAME = 2
 PREFERRED_MORE = 3
 STRENGTH_TOLERANCE = 0.0000000001
 STRENGTH_THRESHOLD = 0.1
+PROFILE_CACHE_SIZE = 1024
+STRENGTH_SOLVER_FLOW = "flow"
+STRENGTH_SOLVER_SUBSETS = "subsets"
 NODE_SINK = -1
 NODE_SOURCE = -2
 
@@ -32,6 +40,8 @@ NODE_SOURCE = -2
 
 class SchulzeHelper(CondorcetHelper):
 
+    strength_solver = None
+
     def condorcet_completion_method(self):
         self.schwartz_set_heuristic()
 
@@ -39,12 +49,13 @@ class SchulzeHelper(CondorcetHelper):
 
         # Iterate through using the Schwartz set heuristic
         self.actions = []
-        while len(self.graph.edges()) > 0:
-            access = accessibility(self.graph)
-            mutual_access = mutual_accessibility(self.graph)
+        while self.graph.edge_count > 0:
+            self.stats_count("heuristic_rounds")
+            access = self.graph.accessibility()
+            mutual_access = self.graph.mutual_accessibility()
             candidates_to_remove = set()
             for candidate in self.graph.nodes():
-                candidates_to_remove |= (set(access[candidate]) - set(mutual_access[candidate]))
+                candidates_to_remove |= access[candidate] - mutual_access[candidate]
 
             # Remove nodes at the end of non-cycle paths
             if len(candidates_to_remove) > 0:
@@ -61,9 +72,102 @@ class SchulzeHelper(CondorcetHelper):
 
         self.graph_winner()
 
+    # Determines the winner from the strongest paths between candidates rather
+    # than by whittling down the graph, leaving no actions behind
+    def strongest_path_winner(self):
+        winners, self.ranking, self.path_strengths = self.strongest_paths(self.matrix_candidates, self.matrix)
+        if len(winners) == 1:
+            self.winner = list(winners)[0]
+        else:
+            self.tied_winners = winners
+            self.winner = self.break_ties(winners)
+
+    # Computes the strength of the strongest (widest) path between each pair of
+    # candidates using the Floyd-Warshall algorithm, where a link only exists
+    # where one candidate defeats another. Returns the set of winners, the
+    # ranking as a list of sets of tied candidates, and the path strengths.
+    @staticmethod
+    def strongest_paths(candidates, matrix):
+        n = len(candidates)
+        strengths = [
+            [matrix[i][j] if matrix[i][j] > matrix[j][i] else 0 for j in range(n)]
+            for i in range(n)
+        ]
+        if numpy is not None and n > 0:
+            strengths = numpy.array(strengths)
+            for k in range(n):
+                strengths = numpy.maximum(strengths, numpy.minimum(strengths[:, k, None], strengths[None, k, :]))
+            strengths = strengths.tolist()
+        else:
+            for k in range(n):
+                for i in range(n):
+                    if strengths[i][k] == 0:
+                        continue
+                    for j in range(n):
+                        strength = min(strengths[i][k], strengths[k][j])
+                        if strength > strengths[i][j]:
+                            strengths[i][j] = strength
+        for i in range(n):
+            strengths[i][i] = 0
+
+        # Peel off the candidates no remaining candidate has a stronger path over
+        ranking = []
+        remaining = set(range(n))
+        while remaining:
+            tier = set([
+                i for i in remaining
+                if all(strengths[i][j] >= strengths[j][i] for j in remaining)
+            ])
+            ranking.append(set(candidates[i] for i in tier))
+            remaining -= tier
+
+        return (ranking[0] if ranking else set()), ranking, strengths
+
+    # Orders the candidates by electing the Schulze winner among those that
+    # remain, as in rerunning the Schulze method once per position, but from a
+    # single pairwise matrix. Each winner is masked out by updating the number
+    # of remaining candidates that beat each candidate, and strongest paths
+    # are only computed, on the remaining submatrix, when nobody is unbeaten.
+    def strongest_path_order(self, candidates, matrix):
+        self.order = []
+        self.rounds = []
+        remaining = range(len(candidates))
+        beaten_by = [sum(1 for j in remaining if matrix[j][i] > matrix[i][j]) for i in remaining]
+        while len(remaining) > 1 and (self.winner_threshold is None or len(self.order) < self.winner_threshold):
+            winners = set([i for i in remaining if beaten_by[i] == 0])
+            if not winners:
+                submatrix = [[matrix[i][j] for j in remaining] for i in remaining]
+                winners = set(remaining[i] for i in self.strongest_paths(range(len(remaining)), submatrix)[0])
+
+            # Mark the candidate that won. Ties are broken by a tie breaker seeded
+            # with the candidates remaining at the first tie, as the repeated
+            # single winner counts did.
+            r = {}
+            if len(winners) == 1:
+                r['winner'] = candidates[list(winners)[0]]
+            else:
+                r['tied_winners'] = set(candidates[i] for i in winners)
+                if self.tie_breaker is None:
+                    self.tie_breaker = TieBreaker(set(candidates[i] for i in remaining))
+                r['winner'] = self.break_ties(r['tied_winners'])
+            self.order.append(r['winner'])
+            self.rounds.append(r)
+
+            # Mask the winner out of the matrix
+            winner = candidates.index(r['winner'])
+            remaining.remove(winner)
+            for i in remaining:
+                if matrix[winner][i] > matrix[i][winner]:
+                    beaten_by[i] -= 1
+
+        # Note the last remaining candidate
+        if remaining and (self.winner_threshold is None or len(self.order) < self.winner_threshold):
+            r = {'winner': candidates[remaining[0]]}
+            self.order.append(r['winner'])
+            self.rounds.append(r)
+
     def generate_vote_management_graph(self):
-        self.vote_management_graph = digraph()
-        self.vote_management_graph.add_nodes(self.completed_patterns)
+        self.vote_management_graph = Digraph(self.completed_patterns)
         self.vote_management_graph.del_node(tuple([PREFERRED_MORE] * self.required_winners))
         self.pattern_nodes = self.vote_management_graph.nodes()
         self.vote_management_graph.add_nodes([NODE_SOURCE, NODE_SINK])
@@ -78,7 +182,9 @@ class SchulzeHelper(CondorcetHelper):
         for i in range(self.required_winners):
             self.vote_management_graph.add_edge((i, NODE_SINK))
 
-    # Generates a list of all patterns that do not contain indifference
+    # Generates a list of all patterns that do not contain indifference, along
+    # with the tables used to work on base 3 pattern codes. The first winner is
+    # the most significant digit, so codes sort in the same order as patterns.
     def generate_completed_patterns(self):
         self.completed_patterns = []
         for i in range(0, self.required_winners + 1):
@@ -87,109 +193,247 @@ class SchulzeHelper(CondorcetHelper):
                     + [PREFERRED_MORE] * (i)
             ):
                 self.completed_patterns.append(tuple(pattern))
+        self.completed_codes = sorted(self.encode_pattern(pattern) for pattern in self.completed_patterns)
+        self.patterns = list(itertools.product([PREFERRED_LESS, PREFERRED_SAME, PREFERRED_MORE], repeat=self.required_winners))
+        self.pattern_powers = [3 ** (self.required_winners - i - 1) for i in range(self.required_winners)]
+        self.refinements = {}
+        self.projections = {}
+        self.indifference_levels = [[] for i in range(self.required_winners + 1)]
+        for code, pattern in enumerate(self.patterns):
+            self.indifference_levels[pattern.count(PREFERRED_SAME)].append(code)
+        if numpy is not None:
+            self.pattern_digits = numpy.array(self.patterns, dtype=int).reshape(len(self.patterns), self.required_winners) - PREFERRED_LESS
+
+    @staticmethod
+    def encode_pattern(pattern):
+        code = 0
+        for preference in pattern:
+            code = code * 3 + preference - PREFERRED_LESS
+        return code
 
     def proportional_completion(self, candidate, other_candidates):
-        profile = dict(zip(self.completed_patterns, [0] * len(self.completed_patterns)))
+        profile = self.complete_profile(self.tally_patterns(candidate, other_candidates))
+        return dict((self.patterns[code], float(profile[code])) for code in self.completed_codes)
 
-        # Obtain an initial tally from the ballots
-        for ballot in self.ballots:
-            pattern = []
+    # Tallies the raw pattern of each ballot, comparing the candidate against
+    # each of the other candidates in turn, into a flat array indexed by code
+    def tally_patterns(self, candidate, other_candidates):
+        candidate = self.registry.id(candidate)
+        other_candidates = [self.registry.id(other_candidate) for other_candidate in other_candidates]
+        if numpy is not None:
+            ranks, counts = self.ranked_ballot_arrays()
+            digits = numpy.sign(ranks[:, candidate, None] - ranks[:, other_candidates]).astype(int) + 1
+            codes = numpy.dot(digits, numpy.array(self.pattern_powers, dtype=int).reshape(len(other_candidates)))
+            return numpy.bincount(codes, weights=counts, minlength=len(self.patterns))
+        tally = [0.0] * len(self.patterns)
+        for ranks, count in self.ranked_ballots():
+            rank = ranks[candidate]
+            code = 0
             for other_candidate in other_candidates:
-                if ballot["ballot"][candidate] < ballot["ballot"][other_candidate]:
-                    pattern.append(PREFERRED_LESS)
-                elif ballot["ballot"][candidate] == ballot["ballot"][other_candidate]:
-                    pattern.append(PREFERRED_SAME)
-                else:
-                    pattern.append(PREFERRED_MORE)
-            pattern = tuple(pattern)
-            if pattern not in profile:
-                profile[pattern] = 0.0
-            profile[pattern] += ballot["count"]
-        weight_sum = sum(profile.values())
-
-        # Peel off patterns with indifference (from the most to the least) and apply proportional completion to them
-        while True:
-            m = max(pattern.count(PREFERRED_SAME) for pattern in profile)
-            if m == 0:
-                break
-            for pattern in profile.keys():
-                if pattern.count(PREFERRED_SAME) == m:
-                    self.proportional_completion_round(pattern, profile)
+                code = code * 3 + (0 if rank < ranks[other_candidate] else 1 if rank == ranks[other_candidate] else 2)
+            tally[code] += count
+        return tally
+
+    # Arranges the ranked ballots as numpy arrays of ranks and counts, rebuilt
+    # whenever the ranked ballots change
+    def ranked_ballot_arrays(self):
+        ranked_ballots = self.ranked_ballots()
+        if getattr(self, 'ballot_arrays_source', None) is not ranked_ballots:
+            self.ballot_arrays_source = ranked_ballots
+            self.ballot_arrays = (
+                numpy.array([ranks for (ranks, count) in ranked_ballots], dtype=float).reshape(len(ranked_ballots), len(self.registry)),
+                numpy.array([count for (ranks, count) in ranked_ballots], dtype=float),
+            )
+        return self.ballot_arrays
+
+    # Completes a tally of raw patterns into a profile of patterns without
+    # indifference. Patterns with indifference are peeled off from the most to
+    # the least, and in code order within each level, so that equal tallies
+    # always complete identically.
+    def complete_profile(self, tally):
+        if numpy is not None:
+            profile = numpy.array(tally, dtype=float)
+            present = profile > 0
+        else:
+            profile = [float(weight) for weight in tally]
+            present = [weight > 0 for weight in profile]
+        for code in self.completed_codes:
+            present[code] = True
+        weight_sum = float(sum(profile))
+
+        # Peel off patterns with indifference and apply proportional completion to them
+        rounds = 0
+        for level in range(self.required_winners, 0, -1):
+            for code in self.indifference_levels[level]:
+                if present[code]:
+                    self.proportional_completion_round(code, profile, present)
+                    rounds += 1
+        self.stats_count("completion_rounds", rounds)
 
         try:
-            assert round(weight_sum, 5) == round(sum(profile.values()), 5)
+            assert round(weight_sum, 5) == round(sum(profile), 5)
         except:
-            print "Proportional completion broke (went from %s to %s)" % (weight_sum, sum(profile.values()))
+            print "Proportional completion broke (went from %s to %s)" % (weight_sum, sum(profile))
 
         return profile
 
-    def proportional_completion_round(self, completion_pattern, profile):
-
-        # Remove pattern that contains indifference
-        weight_sum = sum(profile.values())
-        completion_pattern_weight = profile[completion_pattern]
-        del profile[completion_pattern]
-
-        patterns_to_consider = {}
-        for pattern in profile.keys():
-            append = False
-            append_target = []
-            for i in range(len(completion_pattern)):
-                if completion_pattern[i] == PREFERRED_SAME:
-                    append_target.append(pattern[i])
-                    if pattern[i] != PREFERRED_SAME:
-                        append = True
-                else:
-                    append_target.append(completion_pattern[i])
-
-            if append is True:
-                append_target = tuple(append_target)
-                if append_target not in patterns_to_consider:
-                    patterns_to_consider[append_target] = set()
-                patterns_to_consider[append_target].add(pattern)
+    # Removes the pattern with indifference and spreads its weight over the
+    # patterns it could be refined into, in proportion to the weight of the
+    # present patterns that refine it that way
+    def proportional_completion_round(self, completion_code, profile, present):
+        completion_pattern_weight = profile[completion_code]
+        profile[completion_code] = 0.0
+        present[completion_code] = False
+        base_code, indifferent_code, projections, compatible = self.refinement_index(completion_code)
 
-        denominator = 0
-        for (append_target, patterns) in patterns_to_consider.items():
-            for pattern in patterns:
-                denominator += profile[pattern]
+        if numpy is not None:
+            considered = present & compatible
+            targets, groups = numpy.unique(base_code + projections[considered], return_inverse=True)
+            numerators = numpy.bincount(groups, weights=profile[considered], minlength=len(targets))
+            denominator = numerators.sum()
+            if denominator == 0:
+                profile[targets] += completion_pattern_weight / len(targets)
+            else:
+                profile[targets] += numerators * completion_pattern_weight / denominator
+            present[targets] = True
+            return profile
 
-        # Reweight the remaining items
-        for pattern in patterns_to_consider.keys():
+        numerators = {}
+        for code in compatible:
+            if present[code]:
+                target = base_code + projections[code]
+                numerators[target] = numerators.get(target, 0.0) + profile[code]
+        denominator = sum(numerators.values())
+        for (target, numerator) in numerators.items():
             if denominator == 0:
-                profile[pattern] += completion_pattern_weight / len(patterns_to_consider)
+                profile[target] += completion_pattern_weight / len(numerators)
             else:
-                if pattern not in profile:
-                    profile[pattern] = 0
-                profile[pattern] += sum(profile[considered_pattern] for considered_pattern in patterns_to_consider[pattern]) * completion_pattern_weight / denominator
+                profile[target] += numerator * completion_pattern_weight / denominator
+            present[target] = True
+        return profile
 
-        try:
-            assert round(weight_sum, 5) == round(sum(profile.values()), 5)
-        except:
-            print "Proportional completion round broke (went from %s to %s)" % (weight_sum, sum(profile.values()))
+    # Indexes how every pattern refines a pattern with indifference. A target
+    # keeps the completion pattern's preferences and takes the indifferent
+    # positions from a compatible pattern, i.e. one that is not indifferent at
+    # all of them. The projections onto the indifferent positions depend only
+    # on those positions, so they are shared between completion patterns and
+    # kept for every combination of candidates.
+    def refinement_index(self, completion_code):
+        if completion_code not in self.refinements:
+            completion_pattern = self.patterns[completion_code]
+            indifferent = [i for i in range(self.required_winners) if completion_pattern[i] == PREFERRED_SAME]
+            indifferent_code = sum(self.pattern_powers[i] for i in indifferent)
+            if indifferent_code not in self.projections:
+                if numpy is not None:
+                    projections = numpy.dot(self.pattern_digits[:, indifferent], [self.pattern_powers[i] for i in indifferent])
+                    compatible = projections != indifferent_code
+                else:
+                    projections = [
+                        sum((pattern[i] - PREFERRED_LESS) * self.pattern_powers[i] for i in indifferent)
+                        for pattern in self.patterns
+                    ]
+                    compatible = [code for (code, projection) in enumerate(projections) if projection != indifferent_code]
+                self.projections[indifferent_code] = (projections, compatible)
+            self.refinements[completion_code] = (completion_code - indifferent_code, indifferent_code) + self.projections[indifferent_code]
+        return self.refinements[completion_code]
 
-        return profile
+    # Determines the strength of the vote management of the other candidates
+    # against the candidate, preparing the patterns and vote management graph
+    # first if the number of required winners has changed
+    def vote_management_strength(self, required_winners, candidate, other_candidates):
+        if required_winners != self.required_winners:
+            self.required_winners = required_winners
+            self.generate_completed_patterns()
+            self.generate_vote_management_graph()
+
+        # Many combinations of candidates share the same raw tally, so the
+        # completed profile and its strength are cached by tally
+        if not hasattr(self, 'profile_cache'):
+            self.profile_cache = ProfileCache(PROFILE_CACHE_SIZE)
+        with self.stats_phase("tally"):
+            tally = self.tally_patterns(candidate, other_candidates)
+        key = (self.required_winners, self.strength_solver, self.profile_key(tally))
+        cached = self.profile_cache.get(key)
+        if cached is None:
+            self.stats_count("profile_cache_misses")
+            with self.stats_phase("completion"):
+                completed = self.complete_profile(tally)
+            with self.stats_phase("strength"):
+                cached = (completed, self.strength_of_vote_management(completed))
+            self.profile_cache.set(key, cached)
+        else:
+            self.stats_count("profile_cache_hits")
+        return cached[1]
+
+    # Lists the patterns present in a tally, along with their weights
+    @staticmethod
+    def profile_key(tally):
+        if numpy is not None:
+            codes = numpy.flatnonzero(tally)
+            return tuple(codes.tolist()), tuple(numpy.asarray(tally)[codes].tolist())
+        return tuple((code, weight) for (code, weight) in enumerate(tally) if weight)
+
+    # Measures the strength of vote management with the chosen solver. Both
+    # solvers arrive at the same limit.
+    def strength_of_vote_management(self, voter_profile):
+        if self.strength_solver is None or self.strength_solver == STRENGTH_SOLVER_SUBSETS:
+            return self.strength_by_subsets(voter_profile)
+        elif self.strength_solver == STRENGTH_SOLVER_FLOW:
+            return self.strength_by_max_flow(voter_profile)
+        else:
+            raise Exception("Unknown strength solver specified", self.strength_solver)
+
+    # The iteration in strength_by_max_flow converges on the largest r for
+    # which every winner can be sent r votes at once. By the max-flow min-cut
+    # theorem, that is the smallest value, over every proper subset T of the
+    # winners, of the weight of patterns that support some winner outside T,
+    # divided by the number of winners outside T. The weight of patterns whose
+    # supported winners all lie within T is summed over subsets beforehand.
+    def strength_by_subsets(self, voter_profile):
+        self.stats_count("subset_solves")
+        subsets = 1 << self.required_winners
+        covered = [0.0] * subsets
+        for code in self.completed_codes:
+            mask = sum(1 << i for i in range(self.required_winners) if self.patterns[code][i] == PREFERRED_LESS)
+            if mask:
+                covered[mask] += voter_profile[code]
+        total = sum(covered)
+        for i in range(self.required_winners):
+            for subset in range(subsets):
+                if subset & (1 << i):
+                    covered[subset] += covered[subset ^ (1 << i)]
+        strength = min(
+            (total - covered[subset]) / (self.required_winners - bin(subset).count("1"))
+            for subset in range(subsets - 1)
+        )
+
+        # We expect strengths to be above a specified threshold
+        if strength * self.required_winners < STRENGTH_THRESHOLD:
+            return 0
+        return round(strength, 9)
 
     # This method converts the voter profile into a capacity graph and iterates
     # on the maximum flow using the Edmonds Karp algorithm. The end result is
     # the limit of the strength of the voter management as per Markus Schulze's
     # Calcul02.pdf (draft, 28 March 2008, abstract: "In this paper we illustrate
     # the calculation of the strengths of the vote managements.").
-    def strength_of_vote_management(self, voter_profile):
+    def strength_by_max_flow(self, voter_profile):
 
         # Initialize the graph weights
         for pattern in self.pattern_nodes:
-            self.vote_management_graph.set_edge_weight((NODE_SOURCE, pattern), voter_profile[pattern])
+            weight = voter_profile[self.encode_pattern(pattern)]
+            self.vote_management_graph.set_edge_weight((NODE_SOURCE, pattern), weight)
             for i in range(self.required_winners):
                 if pattern[i] == 1:
-                    self.vote_management_graph.set_edge_weight((pattern, i), voter_profile[pattern])
+                    self.vote_management_graph.set_edge_weight((pattern, i), weight)
 
         # Iterate towards the limit
-        r = [(float(sum(voter_profile.values())) - voter_profile[tuple([PREFERRED_MORE] * self.required_winners)]) / self.required_winners]
+        r = [(float(sum(voter_profile)) - voter_profile[len(self.patterns) - 1]) / self.required_winners]
         while len(r) < 2 or r[-2] - r[-1] > STRENGTH_TOLERANCE:
             for i in range(self.required_winners):
                 self.vote_management_graph.set_edge_weight((i, NODE_SINK), r[-1])
-            max_flow = maximum_flow(self.vote_management_graph, NODE_SOURCE, NODE_SINK)
-            sink_sum = sum(v for k, v in max_flow[0].iteritems() if k[1] == NODE_SINK)
+            self.stats_count("max_flows")
+            sink_sum = self.vote_management_graph.maximum_flow(NODE_SOURCE, NODE_SINK)
             r.append(sink_sum / self.required_winners)
 
             # We expect strengths to be above a specified threshold
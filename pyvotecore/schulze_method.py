@@ -17,16 +17,26 @@ from schulze_helper import SchulzeHelper
 from condorcet import CondorcetSystem
 
 
-# This class implements the Schulze Method (aka the beatpath method)
+# This class implements the Schulze Method (aka the beatpath method). Winners
+# are found through the strongest paths between candidates, unless the actions
+# taken by the Schwartz set heuristic are requested.
 class SchulzeMethod(CondorcetSystem, SchulzeHelper):
 
-    def __init__(self, ballots, tie_breaker=None, ballot_notation=None):
+    def __init__(self, ballots, tie_breaker=None, ballot_notation=None, record_actions=False, stats=None):
+        self.record_actions = record_actions
         super(SchulzeMethod, self).__init__(
             ballots,
             tie_breaker=tie_breaker,
             ballot_notation=ballot_notation,
+            stats=stats,
         )
 
+    def condorcet_completion_method(self):
+        if self.record_actions:
+            self.schwartz_set_heuristic()
+        else:
+            self.strongest_path_winner()
+
     def as_dict(self):
         data = super(SchulzeMethod, self).as_dict()
         if hasattr(self, 'actions'):
@@ -13,26 +13,32 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from abstract_classes import AbstractOrderingVotingSystem
+from abstract_classes import OrderingVotingSystem
 from schulze_helper import SchulzeHelper
-from schulze_method import SchulzeMethod
+from stats import Stats
 
 
-#
-class SchulzeNPR(AbstractOrderingVotingSystem, SchulzeHelper):
+# This class implements the Schulze Method's non-proportional ranking, which
+# repeatedly elects the Schulze winner among the candidates not yet ordered
+class SchulzeNPR(OrderingVotingSystem, SchulzeHelper):
 
-    def __init__(self, ballots, winner_threshold=None, tie_breaker=None, ballot_notation=None):
+    def __init__(self, ballots, winner_threshold=None, tie_breaker=None, ballot_notation=None, stats=None):
+        self.stats = Stats.coerce(stats)
         self.standardize_ballots(ballots, ballot_notation)
         super(SchulzeNPR, self).__init__(
             self.ballots,
-            single_winner_class=SchulzeMethod,
             winner_threshold=winner_threshold,
             tie_breaker=tie_breaker,
+            stats=self.stats,
         )
 
-    @staticmethod
-    def ballots_without_candidate(ballots, candidate):
-        for ballot in ballots:
-            if candidate in ballot['ballot']:
-                del ballot['ballot'][candidate]
-        return ballots
+    def calculate_results(self):
+        with self.stats_phase("tally"):
+            self.matrix_candidates, self.matrix = self.ballots_into_matrix(self.registry.candidates, self.ballots)
+        with self.stats_phase("winner"):
+            self.strongest_path_order(self.matrix_candidates, self.matrix)
+
+    def as_dict(self):
+        data = super(SchulzeNPR, self).as_dict()
+        data["rounds"] = self.rounds
+        return data
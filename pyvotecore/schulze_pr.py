@@ -16,18 +16,24 @@
 # This class implements the Schulze Proportional Ranking Method as defined
 # in schulze2.pdf
 from schulze_helper import SchulzeHelper
+from executors import StrengthPool
 from abstract_classes import OrderingVotingSystem
-from pygraph.classes.digraph import digraph
+from stats import Stats
+from digraph import Digraph
 
 
 class SchulzePR(OrderingVotingSystem, SchulzeHelper):
 
-    def __init__(self, ballots, tie_breaker=None, winner_threshold=None, ballot_notation=None):
+    def __init__(self, ballots, tie_breaker=None, winner_threshold=None, ballot_notation=None, executor=None, strength_solver=None, stats=None):
+        self.executor = executor
+        self.strength_solver = strength_solver
+        self.stats = Stats.coerce(stats)
         self.standardize_ballots(ballots, ballot_notation)
         super(SchulzePR, self).__init__(
             self.ballots,
             tie_breaker=tie_breaker,
             winner_threshold=winner_threshold,
+            stats=self.stats,
         )
 
     def calculate_results(self):
@@ -41,41 +47,52 @@ class SchulzePR(OrderingVotingSystem, SchulzeHelper):
         else:
             winner_threshold = min(len(self.candidates), self.winner_threshold + 1)
 
-        for self.required_winners in range(1, winner_threshold):
-
-            # Generate the list of patterns we need to complete
-            self.generate_completed_patterns()
-            self.generate_vote_management_graph()
-
-            # Generate the edges between nodes
-            self.graph = digraph()
-            self.graph.add_nodes(remaining_candidates)
-            self.winners = set([])
-            self.tied_winners = set([])
-
-            # Generate the edges between nodes
-            for candidate_from in remaining_candidates:
-                other_candidates = sorted(list(remaining_candidates - set([candidate_from])))
-                for candidate_to in other_candidates:
-                    completed = self.proportional_completion(candidate_from, set([candidate_to]) | set(self.order))
-                    weight = self.strength_of_vote_management(completed)
-                    if weight > 0:
-                        self.graph.add_edge((candidate_to, candidate_from), weight)
-
-            # Determine the round winner through the Schwartz set heuristic
-            self.schwartz_set_heuristic()
-
-            # Extract the winner and adjust the remaining candidates list
-            self.order.append(self.winner)
-            round = {"winner": self.winner}
-            if len(self.tied_winners) > 0:
-                round["tied_winners"] = self.tied_winners
-            self.rounds.append(round)
-            remaining_candidates -= set([self.winner])
-            del self.winner
-            del self.actions
-            if hasattr(self, 'tied_winners'):
-                del self.tied_winners
+        pool = StrengthPool(self, self.executor)
+        try:
+            for self.required_winners in range(1, winner_threshold):
+
+                # Generate the list of patterns we need to complete
+                with self.stats_phase("patterns"):
+                    self.generate_completed_patterns()
+                    self.generate_vote_management_graph()
+
+                # Generate the edges between nodes
+                self.graph = Digraph(remaining_candidates)
+                self.winners = set([])
+                self.tied_winners = set([])
+
+                # Generate the edges between nodes
+                pairs = [
+                    (candidate_from, candidate_to)
+                    for candidate_from in remaining_candidates
+                    for candidate_to in sorted(list(remaining_candidates - set([candidate_from])))
+                ]
+                weights = pool.map([
+                    (self.required_winners, candidate_from, list(set([candidate_to]) | set(self.order)))
+                    for candidate_from, candidate_to in pairs
+                ])
+                with self.stats_phase("graph"):
+                    for (candidate_from, candidate_to), weight in zip(pairs, weights):
+                        if weight > 0:
+                            self.graph.add_edge((candidate_to, candidate_from), weight)
+
+                # Determine the round winner through the Schwartz set heuristic
+                with self.stats_phase("winner"):
+                    self.schwartz_set_heuristic()
+
+                # Extract the winner and adjust the remaining candidates list
+                self.order.append(self.winner)
+                round = {"winner": self.winner}
+                if len(self.tied_winners) > 0:
+                    round["tied_winners"] = self.tied_winners
+                self.rounds.append(round)
+                remaining_candidates -= set([self.winner])
+                del self.winner
+                del self.actions
+                if hasattr(self, 'tied_winners'):
+                    del self.tied_winners
+        finally:
+            pool.close()
 
         # Attach the last candidate as the sole winner if necessary
         if self.winner_threshold is None or self.winner_threshold == len(self.candidates):
@@ -13,18 +13,36 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-# This class implements Schulze STV, a proportional representation system
+# This class implements Schulze STV, a proportional representation system.
+# Each possible set of winners, or outcome, is held as a bitmask of candidate
+# ids and identified by its rank in the combinatorial number system, which is
+# its position among the masks of the same size in increasing order. The
+# outcome graph is built on ranks and stored in compressed sparse row form,
+# and outcomes are only spelled out as tuples of candidates in the results.
+#
+# Before any vote management is calculated, its strength is bounded from the
+# pairwise preferences alone. Vote managements that are bound to have no
+# strength are skipped, and so are candidates that can provably never win.
+# The bounds only prove a candidate hopeless when practically every voter
+# ranks it below every other candidate; a weak candidate that a single voter
+# ranks above someone else is kept, though many of its vote managements are
+# still skipped.
 from abstract_classes import MultipleWinnerVotingSystem
-from schulze_helper import SchulzeHelper
-from pygraph.classes.digraph import digraph
-import itertools
+from schulze_helper import SchulzeHelper, STRENGTH_THRESHOLD
+from executors import StrengthPool
+from csr_graph import CSRGraph
+from stats import Stats
+from array import array
 
 
 class SchulzeSTV(MultipleWinnerVotingSystem, SchulzeHelper):
 
-    def __init__(self, ballots, tie_breaker=None, required_winners=1, ballot_notation=None):
+    def __init__(self, ballots, tie_breaker=None, required_winners=1, ballot_notation=None, executor=None, strength_solver=None, stats=None):
+        self.executor = executor
+        self.strength_solver = strength_solver
+        self.stats = Stats.coerce(stats)
         self.standardize_ballots(ballots, ballot_notation)
-        super(SchulzeSTV, self).__init__(self.ballots, tie_breaker=tie_breaker, required_winners=required_winners)
+        super(SchulzeSTV, self).__init__(self.ballots, tie_breaker=tie_breaker, required_winners=required_winners, stats=self.stats)
 
     def calculate_results(self):
 
@@ -34,33 +52,199 @@ class SchulzeSTV(MultipleWinnerVotingSystem, SchulzeHelper):
             return
 
         # Generate the list of patterns we need to complete
-        self.generate_completed_patterns()
-        self.generate_vote_management_graph()
-
-        # Build the graph of possible winners
-        self.graph = digraph()
-        for candidate_set in itertools.combinations(self.candidates, self.required_winners):
-            self.graph.add_nodes([tuple(sorted(list(candidate_set)))])
-
-        # Generate the edges between nodes
-        for candidate_set in itertools.combinations(self.candidates, self.required_winners + 1):
-            for candidate in candidate_set:
-                other_candidates = sorted(set(candidate_set) - set([candidate]))
-                completed = self.proportional_completion(candidate, other_candidates)
-                weight = self.strength_of_vote_management(completed)
+        with self.stats_phase("patterns"):
+            self.generate_completed_patterns()
+            self.generate_vote_management_graph()
+
+        # Set aside the candidates that cannot win
+        with self.stats_phase("pruning"):
+            candidates, self.preferences = self.ballots_into_matrix(self.registry.candidates, self.ballots)
+            self.voters = sum(ballot["count"] for ballot in self.ballots)
+            self.outcome_candidates = self.contending_candidates()
+        self.pruning = {
+            "candidates": self.registry.candidate_set(set(range(len(self.registry))) - set(self.outcome_candidates)),
+            "vote_managements": 0,
+        }
+        if len(self.outcome_candidates) == self.required_winners:
+            self.winners = self.registry.candidate_set(self.outcome_candidates)
+            return
+
+        # Index the possible outcomes. Bit i of an outcome's mask stands for
+        # the i-th contending candidate.
+        with self.stats_phase("graph"):
+            self.binomials = self.binomial_table(len(self.outcome_candidates), self.required_winners + 1)
+            self.outcome_masks = list(self.masks(len(self.outcome_candidates), self.required_winners))
+
+        # Each outcome plus one more candidate yields a vote management of the
+        # outcome against that candidate, which links the outcome to every
+        # outcome that swaps one of its candidates for the extra one
+        tasks = []
+        swaps = []
+        for mask in self.masks(len(self.outcome_candidates), self.required_winners + 1):
+            positions = self.mask_ids(mask)
+            ids = [self.outcome_candidates[position] for position in positions]
+            for i, candidate in enumerate(ids):
+                other_candidates = ids[:i] + ids[i + 1:]
+                if self.strength_ceiling(candidate, other_candidates) * self.required_winners < STRENGTH_THRESHOLD / 2:
+                    self.pruning["vote_managements"] += 1
+                    continue
+                tasks.append((
+                    self.required_winners,
+                    self.registry.candidate(candidate),
+                    [self.registry.candidate(other_candidate) for other_candidate in other_candidates],
+                ))
+                swaps.append((mask, positions[i]))
+        self.stats_count("pruned_vote_managements", self.pruning["vote_managements"])
+        pool = StrengthPool(self, self.executor)
+        try:
+            weights = pool.map(tasks)
+        finally:
+            pool.close()
+
+        # Gather the edges between outcomes into arrays
+        with self.stats_phase("graph"):
+            edge_sources = array('l')
+            edge_targets = array('l')
+            edge_weights = array('d')
+            for (mask, candidate), weight in zip(swaps, weights):
                 if weight > 0:
-                    for subset in itertools.combinations(other_candidates, len(other_candidates) - 1):
-                        self.graph.add_edge((tuple(other_candidates), tuple(sorted(list(subset) + [candidate]))), weight)
+                    source = self.outcome_rank(mask ^ (1 << candidate))
+                    for other_candidate in self.mask_ids(mask):
+                        if other_candidate != candidate:
+                            edge_sources.append(source)
+                            edge_targets.append(self.outcome_rank(mask ^ (1 << other_candidate)))
+                            edge_weights.append(weight)
+            self.graph = CSRGraph(len(self.outcome_masks), edge_sources, edge_targets, edge_weights)
 
         # Determine the winner through the Schwartz set heuristic
-        self.graph_winner()
+        with self.stats_phase("winner"):
+            self.graph_winner()
 
-        # Split the "winner" into its candidate components
-        self.winners = set(self.winner)
+        # Spell out the outcomes in the results, splitting the "winner" into
+        # its candidate components
+        self.winners = set(self.outcome(self.winner))
         del self.winner
+        if hasattr(self, 'tied_winners'):
+            self.tied_winners = set(self.outcome(rank) for rank in self.tied_winners)
+        if hasattr(self, 'actions'):
+            for action in self.actions:
+                if 'nodes' in action:
+                    action['nodes'] = set(self.outcome(rank) for rank in action['nodes'])
+                else:
+                    action['edges'] = set((self.outcome(source), self.outcome(target)) for source, target in action['edges'])
+
+    # The strength of a vote management against a candidate is at most the
+    # number of voters who rank the least supported winner at least as high as
+    # the candidate, since no other votes can be sent to that winner
+    def strength_ceiling(self, candidate, other_candidates):
+        return min(self.voters - self.preferences[candidate][other_candidate] for other_candidate in other_candidates)
+
+    # It is also at least the number of voters who rank the least supported
+    # winner strictly higher than the candidate, shared between the winners.
+    # Proportional completion never takes weight away from a strict preference.
+    def strength_floor(self, candidate, other_candidates):
+        return min(self.preferences[other_candidate][candidate] for other_candidate in other_candidates) / float(self.required_winners)
+
+    # Lists the ids of the candidates that may still win. An outcome with no
+    # strength against any other candidate beats no other outcome. If it is
+    # also beaten by some outcome, it lies outside the Schwartz set, so the
+    # heuristic's first action removes it without touching anything else. A
+    # candidate that puts every outcome it is part of in that position is set
+    # aside, and the rest are checked again, until none is left to set aside.
+    # The bounds are kept well clear of the strength threshold, so that
+    # rounding in either strength solver cannot tip them. This only sets aside
+    # a candidate that practically every voter ranks last: a single voter
+    # ranking it above another candidate lifts that candidate's ceiling
+    # against it above the threshold.
+    def contending_candidates(self):
+        contending = range(len(self.registry))
+        pruned = True
+        while pruned and len(contending) > self.required_winners:
+            pruned = False
+            for candidate in contending:
+                other_candidates = [other_candidate for other_candidate in contending if other_candidate != candidate]
+                if (
+                    all(
+                        self.strength_ceiling(other_candidate, [candidate]) * self.required_winners < STRENGTH_THRESHOLD / 2
+                        for other_candidate in other_candidates
+                    )
+                    and self.strength_floor(candidate, other_candidates) * self.required_winners >= STRENGTH_THRESHOLD * 2
+                ):
+                    contending.remove(candidate)
+                    pruned = True
+                    break
+        return contending
+
+    # Picks the winning outcome from those no other outcome beats, resorting to
+    # the Schwartz set heuristic when every outcome is beaten
+    def graph_winner(self):
+        winning_outcomes = self.graph.unbeaten_nodes()
+        if len(winning_outcomes) == 1:
+            self.winner = list(winning_outcomes)[0]
+        elif len(winning_outcomes) > 1:
+            self.tied_winners = winning_outcomes
+            self.winner = self.break_ties(winning_outcomes)
+        else:
+            self.condorcet_completion_method()
+
+    def schwartz_set_heuristic(self):
+        self.actions = self.graph.schwartz_set_heuristic()
+        self.stats_count("heuristic_rounds", len(self.actions))
+        self.graph_winner()
+
+    # Copies what remains of the outcome graph into a Digraph whose nodes are
+    # tuples of candidates
+    def outcome_digraph(self):
+        return self.graph.as_digraph(self.outcome)
+
+    # Tabulates binomial coefficients, where binomials[n][k] is n choose k
+    @staticmethod
+    def binomial_table(n, k):
+        binomials = [[1] + [0] * k for i in range(n + 1)]
+        for i in range(1, n + 1):
+            for j in range(1, k + 1):
+                binomials[i][j] = binomials[i - 1][j - 1] + binomials[i - 1][j]
+        return binomials
+
+    # Yields the masks of every set of k of the n candidates in increasing
+    # order, and therefore in order of rank
+    @staticmethod
+    def masks(n, k):
+        mask = (1 << k) - 1
+        while mask < 1 << n:
+            yield mask
+            lowest = mask & -mask
+            carried = mask + lowest
+            mask = carried | (((mask ^ carried) >> 2) // lowest)
+
+    @staticmethod
+    def mask_ids(mask):
+        ids = []
+        i = 0
+        while mask:
+            if mask & 1:
+                ids.append(i)
+            mask >>= 1
+            i += 1
+        return ids
+
+    # The rank of a set of candidate ids c1 < c2 < ... < ck is the sum of
+    # ci choose i
+    def outcome_rank(self, mask):
+        return sum(self.binomials[candidate][i + 1] for i, candidate in enumerate(self.mask_ids(mask)))
+
+    def outcome(self, rank):
+        return tuple(self.registry.candidate(self.outcome_candidates[i]) for i in self.mask_ids(self.outcome_masks[rank]))
+
+    # Ties between outcomes are broken between the candidate sets they stand for
+    def break_ties(self, tied_objects, reverse_order=False):
+        outcomes = dict((self.outcome(rank), rank) for rank in tied_objects)
+        return outcomes[super(SchulzeSTV, self).break_ties(set(outcomes.keys()), reverse_order)]
 
     def as_dict(self):
         data = super(SchulzeSTV, self).as_dict()
         if hasattr(self, 'actions'):
             data['actions'] = self.actions
+        if hasattr(self, 'pruning') and (self.pruning["candidates"] or self.pruning["vote_managements"]):
+            data['pruning'] = self.pruning
         return data
@@ -0,0 +1,186 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+# This module writes the results of a count, as returned by as_dict(), to JSON
+# or msgpack without first converting them to plain lists and dicts. Sets are
+# written as lists, and mappings keyed by tuples, such as pairs and
+# strong_pairs, are nested by each element of the key in turn, so that
+# pairs[(a, b)] is written as pairs[a][b]. Lists such as rounds and actions are
+# written one entry at a time, and large sets in slices, so a result can be
+# streamed to a file or socket as it is encoded. The compact mode leaves out
+# the audit trail and writes only the outcome of the count.
+from abstract_classes import VotingSystem
+from itertools import islice
+import json
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SLICE_SIZE = 10000
+
+
+class ResultSerializer(object):
+
+    FORMAT_JSON = "json"
+    FORMAT_MSGPACK = "msgpack"
+
+    AUDIT_TRAIL = ("actions", "rounds", "pairs", "strong_pairs", "tie_breaker", "pruning")
+
+    def __init__(self, format=FORMAT_JSON, compact=False):
+        if format == ResultSerializer.FORMAT_JSON:
+            self.writer = JSONWriter()
+        elif format == ResultSerializer.FORMAT_MSGPACK:
+            if msgpack is None:
+                raise Exception("msgpack is required to serialize results to msgpack", format)
+            self.writer = MsgpackWriter()
+        else:
+            raise Exception("Unknown format specified", format)
+        self.format = format
+        self.compact = compact
+
+    # Yields the encoded result in chunks, given a voting system or the
+    # dictionary its as_dict() returned
+    def iterencode(self, result):
+        if isinstance(result, VotingSystem):
+            result = result.as_dict()
+        if self.compact:
+            result = dict((key, value) for key, value in result.iteritems() if key not in ResultSerializer.AUDIT_TRAIL)
+        return self.walk(result)
+
+    def dump(self, result, fp):
+        for chunk in self.iterencode(result):
+            fp.write(chunk)
+
+    def dumps(self, result):
+        return "".join(self.iterencode(result))
+
+    def walk(self, value):
+        writer = self.writer
+        if isinstance(value, dict):
+            if any(isinstance(key, tuple) for key in value):
+                value = ResultSerializer.nest(value)
+            yield writer.begin_map(len(value))
+            for index, (key, item) in enumerate(value.iteritems()):
+                yield writer.key(key, index)
+                for chunk in self.walk(item):
+                    yield chunk
+            yield writer.end_map()
+        elif isinstance(value, list):
+            yield writer.begin_array(len(value))
+            for index, item in enumerate(value):
+                if index:
+                    yield writer.separator()
+                for chunk in self.walk(item):
+                    yield chunk
+            yield writer.end_array()
+        elif isinstance(value, (set, frozenset)) and len(value) > SLICE_SIZE:
+            yield writer.begin_array(len(value))
+            items = iter(value)
+            for index in xrange(0, len(value), SLICE_SIZE):
+                if index:
+                    yield writer.separator()
+                yield writer.items(list(islice(items, SLICE_SIZE)))
+            yield writer.end_array()
+        else:
+            yield writer.value(value)
+
+    # Turns {(a, b): x} into {a: {b: x}}
+    @staticmethod
+    def nest(mapping):
+        nested = {}
+        for key, value in mapping.iteritems():
+            if isinstance(key, tuple):
+                level = nested
+                for part in key[:-1]:
+                    level = level.setdefault(part, {})
+                level[key[-1]] = value
+            else:
+                nested[key] = value
+        return nested
+
+    # Values the encoders cannot handle on their own
+    @staticmethod
+    def default(value):
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        if hasattr(value, "tolist"):
+            return value.tolist()
+        raise Exception("Cannot serialize value", value)
+
+
+class JSONWriter(object):
+
+    def __init__(self):
+        self.encode = json.JSONEncoder(separators=(",", ":"), default=ResultSerializer.default).encode
+
+    def begin_map(self, length):
+        return "{"
+
+    # Keys that are not strings are written the way the json module writes
+    # them, so that 1 becomes "1" and None becomes "null"
+    def key(self, key, index):
+        if not isinstance(key, basestring):
+            key = self.encode(key)
+        return (index and "," or "") + self.encode(key) + ":"
+
+    def end_map(self):
+        return "}"
+
+    def begin_array(self, length):
+        return "["
+
+    def separator(self):
+        return ","
+
+    def items(self, items):
+        return self.encode(items)[1:-1]
+
+    def end_array(self):
+        return "]"
+
+    def value(self, value):
+        return self.encode(value)
+
+
+class MsgpackWriter(object):
+
+    def __init__(self):
+        self.packer = msgpack.Packer(default=ResultSerializer.default, use_bin_type=False)
+
+    def begin_map(self, length):
+        return self.packer.pack_map_header(length)
+
+    def key(self, key, index):
+        return self.packer.pack(key)
+
+    def end_map(self):
+        return ""
+
+    def begin_array(self, length):
+        return self.packer.pack_array_header(length)
+
+    def separator(self):
+        return ""
+
+    def items(self, items):
+        return "".join(self.packer.pack(item) for item in items)
+
+    def end_array(self):
+        return ""
+
+    def value(self, value):
+        return self.packer.pack(value)
@@ -0,0 +1,114 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# This module collects opt-in statistics on a count: the wall time spent in
+# each of its phases, and how many times key operations ran. Phases may nest,
+# so their times overlap, but a phase entered again while it is already running
+# is only timed once. Operations carried out by worker threads or processes are
+# not counted.
+import time
+
+
+class Stats(object):
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.timings = {}
+        self.counts = {}
+        self.running = {}
+        self.depth = 0
+
+    # Accepts a Stats object, True for a fresh one, or a callback to report to
+    @staticmethod
+    def coerce(stats):
+        if stats is None or stats is False or isinstance(stats, Stats):
+            return stats or None
+        if stats is True:
+            return Stats()
+        if callable(stats):
+            return Stats(stats)
+        raise Exception("Stats must be a Stats object, a callback or True", stats)
+
+    # Times the enclosed block as part of the given phase
+    def phase(self, name):
+        return Phase(self, name)
+
+    def count(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    # Runs the calculation of an election's results. Elections run by other
+    # elections share their statistics, which are reported to the callback once
+    # the outermost election has been decided.
+    def calculate(self, voting_system, calculation):
+        self.depth += 1
+        try:
+            with self.phase("results"):
+                calculation()
+        finally:
+            self.depth -= 1
+        if self.depth == 0 and self.callback is not None:
+            self.callback(voting_system, self.as_dict())
+
+    def as_dict(self):
+        return {
+            "timings": dict(self.timings),
+            "counts": dict(self.counts),
+        }
+
+
+class Phase(object):
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        running = self.stats.running.get(self.name, 0)
+        self.stats.running[self.name] = running + 1
+        if running == 0:
+            self.start = time.time()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats.running[self.name] -= 1
+        if self.stats.running[self.name] == 0:
+            self.stats.timings[self.name] = self.stats.timings.get(self.name, 0.0) + time.time() - self.start
+
+
+# Stands in for a phase when no statistics were requested
+class NullPhase(object):
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+
+# Lets a class record statistics whenever it has been given a Stats object
+class Instrumented(object):
+
+    stats = None
+
+    def stats_phase(self, name):
+        if self.stats is None:
+            return NULL_PHASE
+        return self.stats.phase(name)
+
+    def stats_count(self, name, amount=1):
+        if self.stats is not None:
+            self.stats.count(name, amount)
@@ -14,9 +14,9 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from abstract_classes import MultipleWinnerVotingSystem
-from collections import defaultdict
+from candidate_registry import CandidateRegistry
 from common_functions import matching_keys
-import copy
+from fractions import Fraction
 import math
 
 
@@ -26,8 +26,8 @@ import math
 # would need to be covered in a separate class.
 class STV(MultipleWinnerVotingSystem):
 
-    def __init__(self, ballots, tie_breaker=None, required_winners=1):
-        super(STV, self).__init__(ballots, tie_breaker=tie_breaker, required_winners=required_winners)
+    def __init__(self, ballots, tie_breaker=None, required_winners=1, stats=None):
+        super(STV, self).__init__(ballots, tie_breaker=tie_breaker, required_winners=required_winners, stats=stats)
 
     def calculate_results(self):
 
@@ -38,65 +38,80 @@ class STV(MultipleWinnerVotingSystem):
         if len(self.candidates) < self.required_winners:
             raise Exception("Not enough candidates provided")
 
+        # Count on immutable ballots of candidate ids, piled up under their
+        # current preferences. Candidates are restored as each round is recorded.
+        self.registry = CandidateRegistry(self.candidates)
+        piles = BallotPiles(
+            [tuple(self.registry.id(candidate) for candidate in ballot["ballot"]) for ballot in self.ballots],
+            [ballot["count"] for ballot in self.ballots],
+            len(self.registry),
+        )
+        all_candidates = set(range(len(self.registry)))
+
         self.quota = STV.droop_quota(self.ballots, self.required_winners)
         self.rounds = []
-        self.winners = set()
+        winners = set()
         quota = self.quota
-        ballots = copy.deepcopy(self.ballots)
-        remaining_candidates = self.candidates - self.winners
+        piles.reset(winners)
+        remaining_candidates = all_candidates - winners
 
         # Loop until we have enough candidates
-        while len(self.winners) < self.required_winners and len(remaining_candidates) + len(self.winners) != self.required_winners:
+        while len(winners) < self.required_winners and len(remaining_candidates) + len(winners) != self.required_winners:
 
             # Repopulate the remaining candidates if necessary
             if not remaining_candidates:
-                remaining_candidates = self.candidates - self.winners
+                remaining_candidates = all_candidates - winners
 
             # If all the votes have been used up, start from scratch for the remaining candidates
             round = {}
-            if len(filter(lambda ballot: ballot["count"] > 0 and ballot["ballot"], ballots)) == 0:
-                remaining_candidates = self.candidates - self.winners
+            if not piles.live():
+                remaining_candidates = all_candidates - winners
                 round["note"] = "reset"
-                ballots = copy.deepcopy(self.ballots)
-                for ballot in ballots:
-                    ballot["ballot"] = filter(lambda x: x in remaining_candidates, ballot["ballot"])
-                quota = STV.droop_quota(ballots, self.required_winners - len(self.winners))
+                piles.reset(winners)
+                quota = STV.droop_quota_of_votes(piles.votes(), self.required_winners - len(winners))
 
-            round["tallies"] = self.tallies(ballots)
-            if round["tallies"]:
+            # Tallies are kept exact, and only recorded as floats
+            tallies = piles.tallies()
+            round["tallies"] = dict((self.registry.candidate(candidate), float(tally)) for candidate, tally in tallies.iteritems())
+            if tallies:
 
                 # If any candidates meet or exceeds the quota, they're a winner
-                if max(round["tallies"].values()) >= quota:
+                if max(tallies.values()) >= quota:
 
                     # Collect candidates as winners
-                    round["winners"] = set([
+                    round_winners = set([
                         candidate
-                        for candidate, tally in round["tallies"].items()
+                        for candidate, tally in tallies.items()
                         if tally >= self.quota
                     ])
-                    self.winners |= round["winners"]
-                    remaining_candidates -= round["winners"]
+                    round["winners"] = self.registry.candidate_set(round_winners)
+                    winners |= round_winners
+                    remaining_candidates -= round_winners
 
                     # Redistribute excess votes
-                    for ballot in ballots:
-                        if ballot["ballot"] and ballot["ballot"][0] in round["winners"]:
-                            ballot["count"] *= (round["tallies"][ballot["ballot"][0]] - self.quota) / round["tallies"][ballot["ballot"][0]]
+                    for candidate in round_winners:
+                        piles.scale(candidate, (tallies[candidate] - self.quota) / tallies[candidate])
 
                     # Remove candidates from remaining ballots
-                    ballots = self.remove_candidates_from_ballots(round["winners"], ballots)
+                    piles.exclude(round_winners)
 
                 # If no candidate exceeds the quota, elimiate the least preferred
                 else:
-                    round.update(self.loser(round["tallies"]))
-                    remaining_candidates.remove(round["loser"])
-                    ballots = self.remove_candidates_from_ballots([round["loser"]], ballots)
+                    round.update(self.loser(dict(
+                        (self.registry.candidate(candidate), tally) for candidate, tally in tallies.iteritems()
+                    )))
+                    loser = self.registry.id(round["loser"])
+                    remaining_candidates.remove(loser)
+                    piles.exclude([loser])
 
             # Record this round's actions
             self.rounds.append(round)
+            self.stats_count("stv_rounds")
 
         # Append the final winner and return
-        if len(self.winners) < self.required_winners:
-            self.remaining_candidates = remaining_candidates
+        self.winners = self.registry.candidate_set(winners)
+        if len(winners) < self.required_winners:
+            self.remaining_candidates = self.registry.candidate_set(remaining_candidates)
             self.winners |= self.remaining_candidates
 
     def as_dict(self):
@@ -118,27 +133,81 @@ class STV(MultipleWinnerVotingSystem):
             }
 
     @staticmethod
-    def remove_candidates_from_ballots(candidates, ballots):
-        for ballot in ballots:
-            for candidate in candidates:
-                if candidate in ballot["ballot"]:
-                    ballot["ballot"].remove(candidate)
-        return ballots
-
-    def tallies(self, ballots):
-        tallies = dict()
-        for ballot in ballots:
-            for candidate in ballot["ballot"]:
-                tallies[candidate] = 0
-        for ballot in ballots:
-            if ballot["ballot"]:
-                tallies[ballot["ballot"][0]] += ballot["count"]
-        return dict((candidate, votes) for (candidate, votes) in tallies.iteritems())
+    def droop_quota(ballots, seats=1):
+        return STV.droop_quota_of_votes(sum(ballot["count"] for ballot in ballots if ballot["ballot"]), seats)
 
     @staticmethod
-    def droop_quota(ballots, seats=1):
-        voters = 0
-        for ballot in ballots:
-            if ballot["ballot"]:
-                voters += ballot["count"]
-        return int(math.floor(voters / (seats + 1)) + 1)
+    def droop_quota_of_votes(votes, seats=1):
+        return int(math.floor(votes / (seats + 1)) + 1)
+
+
+# This class piles each ballot under its current preference and keeps a running
+# total for each pile, so that eliminating or electing a candidate only touches
+# the ballots in that candidate's pile. Ballots are immutable tuples of
+# candidate ids, each with a cursor marking its current preference and a
+# transfer weight, and excluded candidates are flagged in a bytearray. Weights
+# and totals are exact fractions, so a tally does not depend on the order
+# ballots were transferred in, and surpluses that add up to the quota reach it.
+class BallotPiles(object):
+
+    def __init__(self, ballots, counts, candidates):
+        self.ballots = ballots
+        self.counts = counts
+        self.candidates = candidates
+
+    # Returns every ballot to full weight, piled under its most preferred
+    # candidate that isn't excluded
+    def reset(self, excluded_candidates):
+        self.weights = [Fraction(count) for count in self.counts]
+        self.cursors = [0] * len(self.ballots)
+        self.excluded = bytearray(self.candidates)
+        for candidate in excluded_candidates:
+            self.excluded[candidate] = 1
+        self.piles = [[] for candidate in range(self.candidates)]
+        self.totals = [0] * self.candidates
+        for i in range(len(self.ballots)):
+            self.pile(i)
+
+    # Moves a ballot's cursor past any excluded candidates and piles it there
+    def pile(self, i):
+        ballot, cursor = self.ballots[i], self.cursors[i]
+        while cursor < len(ballot) and self.excluded[ballot[cursor]]:
+            cursor += 1
+        self.cursors[i] = cursor
+        if cursor < len(ballot):
+            self.piles[ballot[cursor]].append(i)
+            self.totals[ballot[cursor]] += self.weights[i]
+
+    # Excludes the candidates from the count, transferring their piles
+    def exclude(self, candidates):
+        for candidate in candidates:
+            self.excluded[candidate] = 1
+        for candidate in candidates:
+            pile, self.piles[candidate] = self.piles[candidate], []
+            self.totals[candidate] = 0
+            for i in pile:
+                self.pile(i)
+
+    # Scales the weight of every ballot in the candidate's pile, and its total
+    def scale(self, candidate, factor):
+        for i in self.piles[candidate]:
+            self.weights[i] *= factor
+        self.totals[candidate] *= factor
+
+    # Determines whether any weight remains on a ballot still in the count
+    def live(self):
+        return any(
+            self.weights[i] > 0
+            for candidate in range(self.candidates) if not self.excluded[candidate]
+            for i in self.piles[candidate]
+        )
+
+    # Sums the full counts of the ballots still in the count
+    def votes(self):
+        return sum(self.counts[i] for i, ballot in enumerate(self.ballots) if self.cursors[i] < len(ballot))
+
+    def tallies(self):
+        return dict(
+            (candidate, self.totals[candidate])
+            for candidate in range(self.candidates) if not self.excluded[candidate]
+        )
@@ -7,9 +7,12 @@ README = open(os.path.join(here, 'README.rst')).read()
 CHANGES = open(os.path.join(here, 'CHANGES.rst')).read()
 LICENSE = open(os.path.join(here, 'LICENSE.txt')).read()
 
-requires = [
-    'python-graph-core >= 1.8.0',
-]
+requires = []
+
+extras = {
+    'numpy': ['numpy'],
+    'msgpack': ['msgpack'],
+}
 
 setup(name='python-vote-core',
       version='20120423.0',
@@ -31,6 +34,7 @@ setup(name='python-vote-core',
       include_package_data=True,
       zip_safe=False,
       install_requires=requires,
+      extras_require=extras,
       tests_require=requires,
       test_suite="test_functionality",
       )
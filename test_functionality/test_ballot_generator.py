@@ -0,0 +1,168 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pyvotecore.ballot_generator import BallotGenerator
+from pyvotecore import ballot_generator
+from pyvotecore.common_functions import canonical_ballot
+from pyvotecore.schulze_method import SchulzeMethod
+from pyvotecore.stv import STV
+from pyvotecore.plurality import Plurality
+import unittest
+
+
+class TestBallotGenerator(unittest.TestCase):
+
+    MODELS = [
+        BallotGenerator.MODEL_IMPARTIAL_CULTURE,
+        BallotGenerator.MODEL_MALLOWS,
+        BallotGenerator.MODEL_PLACKETT_LUCE,
+        BallotGenerator.MODEL_SPATIAL,
+    ]
+
+    #
+    def test_seeds_are_deterministic(self):
+        for model in TestBallotGenerator.MODELS:
+
+            # Generate data
+            first = BallotGenerator("ABCDE", model=model, seed=7, truncation_rate=0.3, tie_rate=0.2)
+            second = BallotGenerator("ABCDE", model=model, seed=7, truncation_rate=0.3, tie_rate=0.2)
+            third = BallotGenerator("ABCDE", model=model, seed=8, truncation_rate=0.3, tie_rate=0.2)
+
+            # Run tests
+            rankings = list(first.rankings(200))
+            self.assertEqual(rankings, list(second.rankings(200)))
+            self.assertNotEqual(rankings, list(third.rankings(200)))
+
+    #
+    def test_truncation_and_ties(self):
+
+        # Generate data
+        complete = list(BallotGenerator("ABCD", seed=1).rankings(100))
+        truncated = list(BallotGenerator("ABCD", seed=1, truncation_rate=1).rankings(100))
+        tied = list(BallotGenerator("ABCD", seed=1, tie_rate=1).rankings(100))
+
+        # Run tests
+        for ranking in complete:
+            self.assertEqual(sorted(ranking), [("A",), ("B",), ("C",), ("D",)])
+        for ranking in truncated:
+            self.assertTrue(1 <= sum(len(group) for group in ranking) < 4)
+        for ranking in tied:
+            self.assertEqual(len(ranking), 1)
+            self.assertEqual(sorted(ranking[0]), ["A", "B", "C", "D"])
+
+    #
+    def test_mallows_dispersion(self):
+
+        # Generate data
+        generator = BallotGenerator(
+            "ABCD",
+            model=BallotGenerator.MODEL_MALLOWS,
+            seed=1,
+            reference="DCBA",
+            dispersion=0.0001,
+        )
+
+        # Run tests
+        self.assertEqual(
+            generator.aggregated_ballots(100),
+            [{"ballot": [["D"], ["C"], ["B"], ["A"]], "count": 100}],
+        )
+
+    #
+    def test_notations(self):
+
+        # Generate data
+        ranking = (("A",), ("B", "C"), ("D",))
+        generator = BallotGenerator("ABCD")
+
+        # Run tests
+        self.assertEqual(generator.write_ballot(ranking, BallotGenerator.BALLOT_NOTATION_GROUPING), [["A"], ["B", "C"], ["D"]])
+        self.assertEqual(generator.write_ballot(ranking, BallotGenerator.BALLOT_NOTATION_RANKING), {"A": 1, "B": 2, "C": 2, "D": 3})
+        self.assertEqual(generator.write_ballot(ranking, BallotGenerator.BALLOT_NOTATION_RATING), {"A": 3, "B": 2, "C": 2, "D": 1})
+        self.assertEqual(generator.write_ballot(ranking, BallotGenerator.BALLOT_NOTATION_ORDERED), ["A", "B", "C", "D"])
+        self.assertEqual(generator.write_ballot(ranking, BallotGenerator.BALLOT_NOTATION_SINGLE), "A")
+
+    #
+    def test_voting_systems_accept_ballots(self):
+
+        # Generate data
+        generator = BallotGenerator("ABCD", model=BallotGenerator.MODEL_SPATIAL, seed=3, truncation_rate=0.2)
+
+        # Run tests
+        for notation in (
+            BallotGenerator.BALLOT_NOTATION_GROUPING,
+            BallotGenerator.BALLOT_NOTATION_RANKING,
+            BallotGenerator.BALLOT_NOTATION_RATING,
+        ):
+            ballots = generator.aggregated_ballots(500, notation)
+            self.assertTrue(SchulzeMethod(ballots, ballot_notation=notation).as_dict()["candidates"] <= set("ABCD"))
+        STV(generator.aggregated_ballots(500, BallotGenerator.BALLOT_NOTATION_ORDERED), required_winners=2)
+        Plurality(generator.aggregated_ballots(500, BallotGenerator.BALLOT_NOTATION_SINGLE))
+
+    #
+    def test_aggregation_matches_stream(self):
+        numpy = ballot_generator.numpy
+        try:
+            for module_numpy in (numpy, None):
+                ballot_generator.numpy = module_numpy
+
+                # Generate data
+                streamed = list(BallotGenerator("ABCD", seed=5, truncation_rate=0.5, tie_rate=0.3).rankings(1000))
+                aggregated = BallotGenerator("ABCD", seed=5, truncation_rate=0.5, tie_rate=0.3).aggregated_ballots(1000)
+
+                # Run tests, where rankings that differ only in the order of
+                # tied candidates are the same ballot
+                keys = [tuple(frozenset(group) for group in ranking) for ranking in streamed]
+                first_seen = []
+                for key in keys:
+                    if key not in first_seen:
+                        first_seen.append(key)
+                self.assertEqual([tuple(frozenset(group) for group in ballot["ballot"]) for ballot in aggregated], first_seen)
+                self.assertEqual([ballot["count"] for ballot in aggregated], [keys.count(key) for key in first_seen])
+        finally:
+            ballot_generator.numpy = numpy
+
+    # Every notation yields at most one weighted ballot per distinct ballot
+    def test_aggregated_ballots_are_distinct(self):
+        for notation in (
+            BallotGenerator.BALLOT_NOTATION_GROUPING,
+            BallotGenerator.BALLOT_NOTATION_RANKING,
+            BallotGenerator.BALLOT_NOTATION_RATING,
+            BallotGenerator.BALLOT_NOTATION_ORDERED,
+            BallotGenerator.BALLOT_NOTATION_SINGLE,
+        ):
+
+            # Generate data
+            generator = BallotGenerator("ABCD", seed=7, truncation_rate=0.3, tie_rate=0.4)
+            aggregated = generator.aggregated_ballots(2000, notation)
+            streamed = list(BallotGenerator("ABCD", seed=7, truncation_rate=0.3, tie_rate=0.4).ballots(2000, notation))
+
+            # Run tests
+            if notation == BallotGenerator.BALLOT_NOTATION_GROUPING:
+                keys = [tuple(frozenset(group) for group in ballot["ballot"]) for ballot in aggregated]
+            else:
+                keys = [canonical_ballot(ballot["ballot"]) for ballot in aggregated]
+            self.assertEqual(len(keys), len(set(keys)))
+            self.assertEqual(sum(ballot["count"] for ballot in aggregated), 2000)
+            if notation == BallotGenerator.BALLOT_NOTATION_SINGLE:
+                self.assertEqual(len(aggregated), len(set(ballot["ballot"] for ballot in streamed)))
+
+    #
+    def test_unknown_model(self):
+        self.assertRaises(Exception, BallotGenerator, "ABC", model="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pyvotecore.ballot_view import BallotView
+from pyvotecore.abstract_classes import AbstractOrderingVotingSystem
+from pyvotecore.schulze_method import SchulzeMethod
+from pyvotecore.schulze_npr import SchulzeNPR
+import copy
+import unittest
+
+
+class SchulzeMethodOrdering(AbstractOrderingVotingSystem):
+
+    def __init__(self, ballots, winner_threshold=None, tie_breaker=None):
+        super(SchulzeMethodOrdering, self).__init__(
+            ballots,
+            single_winner_class=SchulzeMethod,
+            winner_threshold=winner_threshold,
+            tie_breaker=tie_breaker,
+        )
+
+
+class TestBallotView(unittest.TestCase):
+
+    def test_without(self):
+
+        # Generate data
+        ballots = [
+            {"count": 3, "ballot": {"A": 1, "B": 2}},
+            {"count": 2, "ballot": [["A", "C"], ["B"]]},
+            {"count": 1, "ballot": ["C", "A"]},
+            {"ballot": "A"},
+        ]
+        view = BallotView(ballots).without("A")
+
+        # Run tests
+        self.assertEqual(list(view), [
+            {"count": 3, "ballot": {"B": 2}},
+            {"count": 2, "ballot": [["C"], ["B"]]},
+            {"count": 1, "ballot": ["C"]},
+        ])
+        self.assertEqual(list(view.without("C").without("B")), [])
+        self.assertEqual(ballots[1], {"count": 2, "ballot": [["A", "C"], ["B"]]})
+
+    def test_ordering_leaves_ballots_untouched(self):
+
+        # Generate data
+        input = [
+            {"count": 5, "ballot": {"A": 5, "C": 4, "B": 3, "E": 2, "D": 1}},
+            {"count": 5, "ballot": {"A": 5, "D": 4, "E": 3, "C": 2, "B": 1}},
+            {"count": 8, "ballot": {"B": 5, "E": 4, "D": 3, "A": 2, "C": 1}},
+            {"count": 3, "ballot": {"C": 5, "A": 4, "B": 3, "E": 2, "D": 1}},
+            {"count": 7, "ballot": {"C": 5, "A": 4, "E": 3, "B": 2, "D": 1}},
+            {"count": 2, "ballot": {"C": 5, "B": 4, "A": 3, "D": 2, "E": 1}},
+            {"count": 7, "ballot": {"D": 5, "C": 4, "E": 3, "B": 2, "A": 1}},
+            {"count": 8, "ballot": {"E": 5, "B": 4, "A": 3, "D": 2, "C": 1}},
+        ]
+        original = copy.deepcopy(input)
+        output = SchulzeMethodOrdering(input).as_dict()
+
+        # Run tests
+        self.assertEqual(input, original)
+        self.assertEqual(output["order"], SchulzeNPR(input, ballot_notation=SchulzeNPR.BALLOT_NOTATION_RATING).as_dict()["order"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pyvotecore.candidate_registry import CandidateRegistry
+import unittest
+
+
+class TestCandidateRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = CandidateRegistry(set(['Carter', 'Andrea', 'Brad']))
+
+    def test_sorted_ids(self):
+        self.assertEqual(self.registry.candidates, ['Andrea', 'Brad', 'Carter'])
+        self.assertEqual(self.registry.id('Carter'), 2)
+        self.assertEqual(self.registry.candidate(0), 'Andrea')
+
+    def test_intern(self):
+        self.assertEqual(self.registry.intern('Brad'), 1)
+        self.assertEqual(self.registry.intern('Dana'), 3)
+        self.assertEqual(len(self.registry), 4)
+
+    def test_sets(self):
+        self.assertEqual(self.registry.id_set(['Andrea', 'Carter']), set([0, 2]))
+        self.assertEqual(self.registry.candidate_set([1, 2]), set(['Brad', 'Carter']))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -14,6 +14,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from pyvotecore.schulze_method import SchulzeMethod
+from pyvotecore.condorcet import CondorcetHelper
+from pyvotecore.ranked_pairs import RankedPairs
+from pyvotecore.common_functions import read_ballots
+from pyvotecore import condorcet, common_functions
+from StringIO import StringIO
 import unittest
 
 
@@ -112,5 +117,146 @@ class TestCondorcet(unittest.TestCase):
             "winner": 'Andrea'
         })
 
+    def test_matrix_without_numpy(self):
+
+        # Generate data
+        helper = CondorcetHelper()
+        helper.standardize_ballots([
+            {"count": 12, "ballot": {"Andrea": 1, "Brad": 2, "Carter": 3}},
+            {"count": 26, "ballot": {"Andrea": 1, "Carter": 2, "Brad": 3}},
+            {"count": 13, "ballot": {"Carter": 1, "Andrea": 2, "Brad": 3}},
+            {"count": 27.5, "ballot": {"Brad": 1}}
+        ], CondorcetHelper.BALLOT_NOTATION_RANKING)
+        vectorized = CondorcetHelper.ballots_into_matrix(helper.candidates, helper.ballots)
+        numpy, condorcet.numpy = condorcet.numpy, None
+        try:
+            iterative = CondorcetHelper.ballots_into_matrix(helper.candidates, helper.ballots)
+        finally:
+            condorcet.numpy = numpy
+
+        # Run tests
+        self.assertEqual(vectorized, iterative)
+        candidates, matrix = iterative
+        self.assertEqual(matrix[candidates.index("Brad")][candidates.index("Andrea")], 27.5)
+        self.assertEqual(matrix[candidates.index("Andrea")][candidates.index("Carter")], 38)
+
+    def test_streamed_ballots(self):
+
+        # Generate data
+        lines = StringIO(
+            '{"count": 12, "ballot": {"Andrea": 1, "Brad": 2, "Carter": 3}}\n'
+            '{"count": 26, "ballot": {"Andrea": 1, "Carter": 2, "Brad": 3}}\n'
+            '\n'
+            '{"count": 12, "ballot": {"Andrea": 1, "Carter": 2, "Brad": 3}}\n'
+            '{"count": 13, "ballot": {"Carter": 1, "Andrea": 2, "Brad": 3}}\n' +
+            '{"ballot": {"Brad": 1}}\n' * 27
+        )
+        ranked_pairs = RankedPairs(read_ballots(lines), ballot_notation=RankedPairs.BALLOT_NOTATION_RANKING)
+        output = ranked_pairs.as_dict()
+
+        # Run tests
+        self.assertEqual(len(ranked_pairs.ballots), 4)
+        self.assertEqual(ranked_pairs.ballot_entries, 31)
+        self.assertEqual(output["pairs"], {
+            ('Andrea', 'Brad'): 63,
+            ('Brad', 'Carter'): 39,
+            ('Carter', 'Andrea'): 13,
+            ('Andrea', 'Carter'): 50,
+            ('Brad', 'Andrea'): 27,
+            ('Carter', 'Brad'): 51
+        })
+        self.assertEqual(output["winner"], 'Andrea')
+
+    def test_add_and_remove_ballots(self):
+
+        # Generate data
+        input = [
+            {"count": 12, "ballot": {"Andrea": 1, "Brad": 2, "Carter": 3}},
+            {"count": 26, "ballot": {"Andrea": 1, "Carter": 2, "Brad": 3}},
+            {"count": 13, "ballot": {"Carter": 1, "Andrea": 2, "Brad": 3}},
+        ]
+        corrections = [
+            {"count": 45, "ballot": {"Brad": 1}},
+            {"count": 10, "ballot": {"Carter": 1, "Brad": 2, "Andrea": 3}},
+        ]
+        for voting_system in [SchulzeMethod, RankedPairs]:
+            live = voting_system(input, ballot_notation=voting_system.BALLOT_NOTATION_RANKING)
+            live.add_ballots(corrections)
+            added = live.as_dict()
+            live.remove_ballots([{"count": 26, "ballot": {"Andrea": 1, "Carter": 2, "Brad": 3}}])
+            removed = live.as_dict()
+
+            # Run tests
+            self.assertEqual(added, voting_system(input + corrections, ballot_notation=voting_system.BALLOT_NOTATION_RANKING).as_dict())
+            self.assertEqual(removed, voting_system([input[0], input[2]] + corrections, ballot_notation=voting_system.BALLOT_NOTATION_RANKING).as_dict())
+            self.assertEqual(added["winner"], "Brad")
+            self.assertEqual(removed["pairs"][("Andrea", "Brad")], 25)
+            self.assertEqual(live.ballot_entries, 4)
+            self.assertRaises(Exception, live.remove_ballots, [{"count": 26, "ballot": {"Andrea": 1, "Carter": 2, "Brad": 3}}])
+            self.assertRaises(Exception, live.add_ballots, [{"ballot": {"Dana": 1}}])
+
+    # Ballots that only become identical once the candidates they leave out
+    # are filled in are counted, and removed, as one
+    def test_update_merges_filled_ballots(self):
+
+        # Generate data
+        input = [{"count": 2, "ballot": {"A": 1, "B": 2, "C": 3}}]
+        additions = [{"ballot": {"A": 3, "B": 2}}, {"ballot": {"A": 3, "B": 2, "C": 1}}]
+        live = SchulzeMethod(input)
+        live.add_ballots(additions)
+        added = live.as_dict()
+
+        # Run tests
+        self.assertEqual(added["pairs"], SchulzeMethod(input + additions).as_dict()["pairs"])
+        self.assertEqual(added["pairs"][("A", "B")], 2)
+        live.remove_ballots([{"ballot": {"A": 3, "B": 2}}])
+        self.assertEqual(live.as_dict()["pairs"][("A", "B")], 1)
+        self.assertRaises(Exception, live.remove_ballots, additions)
+        self.assertEqual(live.as_dict()["pairs"][("A", "B")], 1)
+
+    # Updates only look at the ballots they add or remove
+    def test_update_leaves_other_ballots_alone(self):
+
+        # Generate data
+        input = [{"count": 1, "ballot": {"A": a, "B": b, "C": c}} for a in range(4) for b in range(4) for c in range(4)]
+        live = SchulzeMethod(input)
+        counted = [ballot["ballot"] for ballot in live.ballots]
+        canonical_ballot = common_functions.canonical_ballot
+        seen = []
+
+        def counting_canonical_ballot(ballot):
+            if isinstance(ballot, dict):
+                seen.append(ballot)
+            return canonical_ballot(ballot)
+        common_functions.canonical_ballot = condorcet.canonical_ballot = counting_canonical_ballot
+        try:
+            live.add_ballots([{"count": 2, "ballot": {"A": 9, "B": 2}}])
+            live.remove_ballots([{"ballot": {"A": 0, "B": 0, "C": 0}}, {"ballot": {"A": 0, "B": 0, "C": 1}}])
+        finally:
+            common_functions.canonical_ballot = condorcet.canonical_ballot = canonical_ballot
+
+        # Run tests
+        self.assertFalse(any(ballot is other for ballot in seen for other in counted))
+        self.assertEqual(len(live.ballots), 63)
+        self.assertEqual(live.as_dict()["pairs"], SchulzeMethod(input[2:] + [{"count": 2, "ballot": {"A": 9, "B": 2}}]).as_dict()["pairs"])
+
+    # Results of the previous count do not outlive it
+    def test_update_clears_stale_results(self):
+
+        # Generate data
+        input = [
+            {"count": 3, "ballot": {"A": 3, "B": 2, "C": 1}},
+            {"count": 3, "ballot": {"B": 3, "C": 2, "A": 1}},
+            {"count": 3, "ballot": {"C": 3, "A": 2, "B": 1}},
+        ]
+        live = SchulzeMethod(input)
+        self.assertTrue(hasattr(live, "ranking"))
+        live.add_ballots([{"count": 5, "ballot": {"A": 3, "B": 2, "C": 1}}])
+
+        # Run tests
+        self.assertEqual(live.winner, "A")
+        self.assertFalse(hasattr(live, "ranking"))
+        self.assertFalse(hasattr(live, "path_strengths"))
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pyvotecore.csr_graph import CSRGraph
+from pyvotecore.schulze_helper import SchulzeHelper
+from pyvotecore.schulze_stv import SchulzeSTV
+import random
+import unittest
+
+
+class DigraphHeuristic(SchulzeHelper):
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def graph_winner(self):
+        pass
+
+
+class TestCSRGraph(unittest.TestCase):
+
+    #
+    def test_strongly_connected_components(self):
+
+        # Generate data
+        graph = CSRGraph(5, [0, 1, 2, 2, 3], [1, 2, 0, 3, 4], [1, 1, 1, 1, 1])
+        component = graph.strongly_connected_components()
+
+        # Run tests
+        self.assertEqual(component[0], component[1])
+        self.assertEqual(component[1], component[2])
+        self.assertEqual(len(set(component)), 3)
+        graph.del_edge((2, 0))
+        self.assertEqual(len(set(graph.strongly_connected_components())), 5)
+        graph.del_node(4)
+        self.assertEqual(graph.strongly_connected_components()[4], -1)
+        self.assertEqual(graph.edges(), [(0, 1), (1, 2), (2, 3)])
+
+    #
+    def test_schwartz_set_heuristic_matches_digraph(self):
+        generator = random.Random(1)
+        for trial in range(50):
+
+            # Generate data
+            node_count = generator.randint(1, 8)
+            edges = {}
+            for source in range(node_count):
+                for target in range(node_count):
+                    if source != target and generator.random() < 0.4:
+                        edges[(source, target)] = float(generator.randint(1, 4))
+            graph = CSRGraph(node_count, [edge[0] for edge in edges], [edge[1] for edge in edges], edges.values())
+            helper = DigraphHeuristic(graph.as_digraph())
+            helper.schwartz_set_heuristic()
+
+            # Run tests
+            self.assertEqual(graph.schwartz_set_heuristic(), helper.actions)
+            self.assertEqual(set(graph.nodes()), set(helper.graph.nodes()))
+            self.assertEqual(graph.edges(), [])
+
+    #
+    def test_outcome_digraph(self):
+
+        # Generate data
+        input = [
+            {"count": 60, "ballot": [["A"], ["B"], ["C"]]},
+            {"count": 40, "ballot": [["B"], ["C"], ["A"]]},
+        ]
+        output = SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING)
+
+        # Run tests
+        self.assertEqual(output.winners, set(["A", "B"]))
+        self.assertEqual(output.outcome_digraph().nodes(), [("A", "B")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from pyvotecore.digraph import Digraph
+import unittest
+
+
+class TestDigraph(unittest.TestCase):
+
+    #
+    def test_nodes_and_edges(self):
+
+        # Generate data
+        graph = Digraph(["A", "B", "C"])
+        graph.add_edge(("A", "B"), 3)
+        graph.add_edge(("B", "C"))
+        graph.add_edge(("C", "A"), 2)
+        graph.add_node("D")
+        graph.add_edge(("D", "A"), 5)
+
+        # Run tests
+        self.assertEqual(graph.nodes(), ["A", "B", "C", "D"])
+        self.assertEqual(graph.edges(), [("A", "B"), ("B", "C"), ("C", "A"), ("D", "A")])
+        self.assertEqual(graph.edge_weight(("A", "B")), 3)
+        self.assertEqual(graph.edge_weight(("B", "C")), 1)
+        self.assertRaises(Exception, graph.add_edge, ("A", "B"))
+        graph.del_node("A")
+        self.assertEqual(graph.nodes(), ["B", "C", "D"])
+        self.assertEqual(graph.edges(), [("B", "C")])
+        self.assertEqual(graph.edge_count, 1)
+        self.assertFalse(graph.has_edge(("D", "A")))
+
+    #
+    def test_accessibility(self):
+
+        # Generate data
+        graph = Digraph(["A", "B", "C", "D", "E"])
+        for edge in [("A", "B"), ("B", "C"), ("C", "A"), ("C", "D"), ("D", "E")]:
+            graph.add_edge(edge)
+
+        # Run tests
+        self.assertEqual(graph.accessibility(), {
+            "A": set(["A", "B", "C", "D", "E"]),
+            "B": set(["A", "B", "C", "D", "E"]),
+            "C": set(["A", "B", "C", "D", "E"]),
+            "D": set(["D", "E"]),
+            "E": set(["E"]),
+        })
+        self.assertEqual(graph.mutual_accessibility(), {
+            "A": set(["A", "B", "C"]),
+            "B": set(["A", "B", "C"]),
+            "C": set(["A", "B", "C"]),
+            "D": set(["D"]),
+            "E": set(["E"]),
+        })
+
+    #
+    def test_maximum_flow(self):
+
+        # Generate data
+        graph = Digraph(["S", "A", "B", "T"])
+        graph.add_edge(("S", "A"), 10)
+        graph.add_edge(("S", "B"), 5)
+        graph.add_edge(("A", "B"), 15)
+        graph.add_edge(("A", "T"), 5)
+        graph.add_edge(("B", "T"), 10)
+
+        # Run tests
+        self.assertEqual(graph.maximum_flow("S", "T"), 15)
+        graph.set_edge_weight(("B", "T"), 2.5)
+        self.assertEqual(graph.maximum_flow("S", "T"), 7.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
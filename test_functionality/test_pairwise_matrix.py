@@ -0,0 +1,71 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pyvotecore.pairwise_matrix import PairwiseMatrix
+from pyvotecore.ranked_pairs import RankedPairs, RankedPairsByGraph
+from pyvotecore.schulze_method import SchulzeMethod
+from pyvotecore.schulze_by_graph import SchulzeMethodByGraph, SchulzeNPRByGraph
+from pyvotecore.schulze_npr import SchulzeNPR
+import unittest
+
+
+class TestPairwiseMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.ballots = [
+            {"count": 3, "ballot": [["A"], ["C"], ["D"], ["B"]]},
+            {"count": 9, "ballot": [["B"], ["A"], ["C"], ["D"]]},
+            {"count": 8, "ballot": [["C"], ["D"], ["A"], ["B"]]},
+            {"count": 5, "ballot": [["D"], ["A"], ["B"], ["C"]]},
+            {"count": 5, "ballot": [["D"], ["B"], ["C"], ["A"]]},
+            {"count": 4, "ballot": [["E"], ["B"]]},
+            {"count": 2, "ballot": [["C", "A"]]},
+        ]
+        self.shards = [
+            PairwiseMatrix(self.ballots[0:2], RankedPairs.BALLOT_NOTATION_GROUPING),
+            PairwiseMatrix(self.ballots[2:5], RankedPairs.BALLOT_NOTATION_GROUPING),
+            PairwiseMatrix(self.ballots[5:], RankedPairs.BALLOT_NOTATION_GROUPING),
+        ]
+
+    def test_merged_shards(self):
+        expected = RankedPairs(self.ballots, ballot_notation=RankedPairs.BALLOT_NOTATION_GROUPING).pairs
+        self.assertEqual((self.shards[0] + self.shards[1] + self.shards[2]).edges(), expected)
+        self.assertEqual((self.shards[2] + (self.shards[0] + self.shards[1])).edges(), expected)
+        self.assertEqual((self.shards[1] + self.shards[2] + self.shards[0]).edges(), expected)
+        self.assertEqual(self.shards[0].edges(), RankedPairs(self.ballots[0:2], ballot_notation=RankedPairs.BALLOT_NOTATION_GROUPING).pairs)
+
+    def test_merge_leaves_shards_untouched(self):
+        edges = self.shards[0].edges()
+        self.shards[0] + self.shards[2]
+        self.assertEqual(self.shards[0].edges(), edges)
+        self.assertEqual(self.shards[0].candidates, set(["A", "B", "C", "D"]))
+
+    def test_by_graph_systems(self):
+        edges = (self.shards[0] + self.shards[1] + self.shards[2]).edges()
+        self.assertEqual(
+            SchulzeMethodByGraph(edges).as_dict()["winner"],
+            SchulzeMethod(self.ballots, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING).as_dict()["winner"],
+        )
+        self.assertEqual(
+            SchulzeNPRByGraph(edges).as_dict()["order"],
+            SchulzeNPR(self.ballots, ballot_notation=SchulzeNPR.BALLOT_NOTATION_GROUPING).as_dict()["order"],
+        )
+        self.assertEqual(
+            RankedPairsByGraph(edges).as_dict()["winner"],
+            RankedPairs(self.ballots, ballot_notation=RankedPairs.BALLOT_NOTATION_GROUPING).as_dict()["winner"],
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -73,6 +73,25 @@ class TestPluralityAtLarge(unittest.TestCase):
         self.assert_("c1" in output["winners"] and ("c2" in output["winners"] or "c3" in output["winners"]))
         self.assertEqual(len(output), 5)
 
+    # Plurality at Large, identical ballots collapsed into weighted ballots
+    def test_plurality_at_large_aggregated_ballots(self):
+
+        # Generate data
+        plurality_at_large = PluralityAtLarge([
+            {"count": 26, "ballot": ["c1", "c2"]},
+            {"count": 22, "ballot": ["c1", "c3"]},
+            {"count": 4, "ballot": ["c1", "c2"]},
+            {"ballot": ["c1", "c2"]},
+        ], required_winners=2)
+
+        # Run tests
+        self.assertEqual(plurality_at_large.ballots, [
+            {"count": 31, "ballot": ["c1", "c2"]},
+            {"count": 22, "ballot": ["c1", "c3"]},
+        ])
+        self.assertEqual(plurality_at_large.compression_ratio, 2.0)
+        self.assertEqual(plurality_at_large.as_dict()["tallies"], {'c1': 53, 'c2': 31, 'c3': 22})
+
 
 if __name__ == "__main__":
     unittest.main()
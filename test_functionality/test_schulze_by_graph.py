@@ -14,6 +14,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from pyvotecore.schulze_by_graph import SchulzeMethodByGraph, SchulzeNPRByGraph
+from pyvotecore.ranked_pairs import RankedPairsByGraph
 import unittest
 
 
@@ -44,6 +45,20 @@ class TestSchulzeMethodByGraph(unittest.TestCase):
             'winner': 'a',
         })
 
+    # Preference tallies have no ballots to add to or remove from
+    def test_update_ballots_unsupported(self):
+
+        # Generate data
+        input = {('a', 'b'): 4, ('b', 'a'): 3}
+        ballots = [{"ballot": {"a": 1, "b": 2}}]
+
+        # Run tests
+        for voting_system in [SchulzeMethodByGraph, RankedPairsByGraph]:
+            election = voting_system(input)
+            self.assertRaises(Exception, election.add_ballots, ballots)
+            self.assertRaises(Exception, election.remove_ballots, ballots)
+            self.assertEqual(election.as_dict()["pairs"], input)
+
 
 class TestSchulzeNPRByGraph(unittest.TestCase):
 
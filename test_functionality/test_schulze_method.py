@@ -31,7 +31,7 @@ class TestSchulzeMethod(unittest.TestCase):
             {"count": 5, "ballot": [["D"], ["A"], ["B"], ["C"]]},
             {"count": 5, "ballot": [["D"], ["B"], ["C"], ["A"]]}
         ]
-        output = SchulzeMethod(input, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING).as_dict()
+        output = SchulzeMethod(input, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING, record_actions=True).as_dict()
 
         # Run tests
         self.assertEqual(output, {
@@ -82,7 +82,7 @@ class TestSchulzeMethod(unittest.TestCase):
             {"count": 7, "ballot": [["D"], ["C"], ["E"], ["B"], ["A"]]},
             {"count": 8, "ballot": [["E"], ["B"], ["A"], ["D"], ["C"]]}
         ]
-        output = SchulzeMethod(input, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING).as_dict()
+        output = SchulzeMethod(input, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING, record_actions=True).as_dict()
 
         # Run tests
         self.assertEqual(output, {
@@ -154,6 +154,33 @@ class TestSchulzeMethod(unittest.TestCase):
         })
         self.assertEqual(output['tied_winners'], set(['A', 'B']))
 
+    # Without recorded actions, the winner comes from the strongest paths
+    def test_strongest_paths(self):
+
+        # Generate data
+        input = [
+            {"count": 5, "ballot": [["A"], ["C"], ["B"], ["E"], ["D"]]},
+            {"count": 5, "ballot": [["A"], ["D"], ["E"], ["C"], ["B"]]},
+            {"count": 8, "ballot": [["B"], ["E"], ["D"], ["A"], ["C"]]},
+            {"count": 3, "ballot": [["C"], ["A"], ["B"], ["E"], ["D"]]},
+            {"count": 7, "ballot": [["C"], ["A"], ["E"], ["B"], ["D"]]},
+            {"count": 2, "ballot": [["C"], ["B"], ["A"], ["D"], ["E"]]},
+            {"count": 7, "ballot": [["D"], ["C"], ["E"], ["B"], ["A"]]},
+            {"count": 8, "ballot": [["E"], ["B"], ["A"], ["D"], ["C"]]}
+        ]
+        schulze_method = SchulzeMethod(input, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING)
+        output = schulze_method.as_dict()
+        strength = lambda a, b: schulze_method.path_strengths[schulze_method.matrix_candidates.index(a)][schulze_method.matrix_candidates.index(b)]
+
+        # Run tests
+        self.assertEqual(output['winner'], 'E')
+        self.assertFalse('actions' in output)
+        self.assertEqual(schulze_method.ranking, [set(['E']), set(['A']), set(['C']), set(['B']), set(['D'])])
+        self.assertEqual(strength('A', 'B'), 28)
+        self.assertEqual(strength('B', 'A'), 25)
+        self.assertEqual(strength('E', 'D'), 31)
+        self.assertEqual(strength('D', 'E'), 24)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -14,6 +14,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from pyvotecore.schulze_npr import SchulzeNPR
+from pyvotecore.schulze_method import SchulzeMethod
 import unittest
 
 
@@ -62,6 +63,56 @@ class TestSchulzeNPR(unittest.TestCase):
             ]
         })
 
+    def test_repeated_schulze_method(self):
+
+        # Generate data
+        input = [
+            {"count": 5, "ballot": [["A"], ["C"], ["B"], ["E"], ["D"]]},
+            {"count": 5, "ballot": [["A"], ["D"], ["E"], ["C"], ["B"]]},
+            {"count": 8, "ballot": [["B"], ["E"], ["D"], ["A"], ["C"]]},
+            {"count": 3, "ballot": [["C"], ["A"], ["B"], ["E"], ["D"]]},
+            {"count": 7, "ballot": [["C"], ["A"], ["E"], ["B"], ["D"]]},
+            {"count": 2, "ballot": [["C"], ["B"], ["A"], ["D"], ["E"]]},
+            {"count": 7, "ballot": [["D"], ["C"], ["E"], ["B"], ["A"]]},
+            {"count": 8, "ballot": [["E"], ["B"], ["A"], ["D"], ["C"]]},
+        ]
+        output = SchulzeNPR(input, ballot_notation=SchulzeNPR.BALLOT_NOTATION_GROUPING).as_dict()
+        order = []
+        remaining = input
+        while len(order) < 4:
+            order.append(SchulzeMethod(remaining, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING).as_dict()["winner"])
+            remaining = [
+                {"count": ballot["count"], "ballot": [[candidate] for [candidate] in ballot["ballot"] if candidate not in order]}
+                for ballot in input
+            ]
+
+        # Run tests
+        self.assertEqual(output["order"][:4], order)
+        self.assertEqual(output["order"], ['E', 'A', 'C', 'B', 'D'])
+
+
+    # Andrea is first on every ballot, and the rest form an even cycle, so the
+    # tie for second place is broken by a tie breaker seeded with the three
+    # candidates left at that point.
+    def test_tie_after_first_place(self):
+
+        # Generate data
+        input = [
+            {"count": 1, "ballot": [["Andrea"], ["Brad"], ["Carter"], ["Dave"]]},
+            {"count": 1, "ballot": [["Andrea"], ["Carter"], ["Dave"], ["Brad"]]},
+            {"count": 1, "ballot": [["Andrea"], ["Dave"], ["Brad"], ["Carter"]]},
+        ]
+        output = SchulzeNPR(input, ballot_notation=SchulzeNPR.BALLOT_NOTATION_GROUPING).as_dict()
+
+        # Run tests
+        self.assertEqual(output["rounds"][1]["tied_winners"], set(["Brad", "Carter", "Dave"]))
+        self.assertEqual(set(output["tie_breaker"]), set(["Brad", "Carter", "Dave"]))
+        self.assertEqual(output["order"][:2], ["Andrea", output["tie_breaker"][0]])
+
+        # A given tie breaker is used as is
+        output = SchulzeNPR(input, tie_breaker=["Dave", "Carter", "Brad", "Andrea"], ballot_notation=SchulzeNPR.BALLOT_NOTATION_GROUPING).as_dict()
+        self.assertEqual(output["order"], ["Andrea", "Dave", "Brad", "Carter"])
+        self.assertEqual(output["tie_breaker"], ["Dave", "Carter", "Brad", "Andrea"])
 
 if __name__ == "__main__":
     unittest.main()
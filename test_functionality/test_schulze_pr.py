@@ -52,6 +52,25 @@ class TestSchulzePR(unittest.TestCase):
             ],
         })
 
+    def test_executors(self):
+
+        # Generate data
+        input = [
+            {"count": 6, "ballot": [["a"], ["d"], ["b"], ["c"], ["e"]]},
+            {"count": 12, "ballot": [["a"], ["d"], ["e"], ["c"], ["b"]]},
+            {"count": 48, "ballot": [["b"], ["e"], ["a"], ["d"], ["c"]]},
+            {"count": 168, "ballot": [["c"], ["a"], ["e"], ["b"], ["d"]]},
+            {"count": 108, "ballot": [["d"], ["b"], ["e"], ["c"], ["a"]]},
+        ]
+        outputs = [
+            SchulzePR(input, ballot_notation=SchulzePR.BALLOT_NOTATION_GROUPING, executor=executor).as_dict()
+            for executor in ["serial", "thread", "process"]
+        ]
+
+        # Run tests
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+
     def test_ties(self):
 
         # Generate data
@@ -14,7 +14,10 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from pyvotecore.schulze_stv import SchulzeSTV
-from pyvotecore.schulze_helper import SchulzeHelper
+from pyvotecore.schulze_helper import SchulzeHelper, STRENGTH_SOLVER_FLOW, STRENGTH_SOLVER_SUBSETS
+from pyvotecore.profile_cache import ProfileCache
+from pyvotecore import schulze_helper
+import itertools
 import unittest
 
 
@@ -103,6 +106,197 @@ class TestSchulzeSTV(unittest.TestCase):
             'winners': set(['Andrea', 'Brad'])
         })
 
+    # Spreading the vote management calculations across threads or processes
+    # must not change the outcome
+    def test_executors(self):
+
+        # Generate data
+        input = [
+            {"count": 12, "ballot": [["Andrea"], ["Brad"], ["Carter"], ["Delilah"]]},
+            {"count": 26, "ballot": [["Andrea"], ["Carter"], ["Delilah"], ["Brad"]]},
+            {"count": 12, "ballot": [["Carter"], ["Andrea"], ["Brad"]]},
+            {"count": 13, "ballot": [["Delilah"], ["Carter"], ["Andrea"], ["Brad"]]},
+            {"count": 27, "ballot": [["Brad"], ["Delilah"]]},
+        ]
+        outputs = [
+            SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING, executor=executor).as_dict()
+            for executor in ["serial", "thread", "process"]
+        ]
+
+        # Run tests
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+
+    #
+    def test_profile_cache(self):
+
+        # Generate data
+        input = [
+            {"count": 3, "ballot": [["a"], ["b"]]},
+            {"count": 2, "ballot": [["c"], ["a"]]},
+            {"count": 2, "ballot": [["d"]]},
+            {"count": 1, "ballot": [["e"]]},
+        ]
+        cached = SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING)
+        helper = SchulzeHelper()
+        helper.standardize_ballots(input, helper.BALLOT_NOTATION_GROUPING)
+        helper.required_winners = 2
+        helper.generate_completed_patterns()
+        helper.generate_vote_management_graph()
+
+        # Run tests
+        self.assertTrue(cached.profile_cache.hits > 0)
+        self.assertEqual(len(cached.profile_cache), cached.profile_cache.misses)
+        for (candidate, other_candidates) in [("d", ["a", "b"]), ("d", ["c", "e"]), ("a", ["b", "c"])]:
+            self.assertEqual(
+                cached.vote_management_strength(2, candidate, other_candidates),
+                helper.strength_of_vote_management(helper.complete_profile(helper.tally_patterns(candidate, other_candidates)))
+            )
+
+    #
+    def test_strength_solvers(self):
+
+        # Generate data
+        input = [
+            {"count": 60, "ballot": [["a"], ["b"], ["c"], ["d"], ["e"]]},
+            {"count": 45, "ballot": [["c"], ["e"], ["a"], ["b"]]},
+            {"count": 30, "ballot": [["d"], ["b"]]},
+            {"count": 15, "ballot": [["e"], ["d"], ["a"]]},
+            {"count": 10, "ballot": [["b"], ["c", "d"]]},
+        ]
+        helper = SchulzeHelper()
+        helper.standardize_ballots(input, helper.BALLOT_NOTATION_GROUPING)
+
+        # Run tests
+        for required_winners in range(1, 4):
+            helper.required_winners = required_winners
+            helper.generate_completed_patterns()
+            helper.generate_vote_management_graph()
+            for candidate_set in itertools.combinations(sorted(helper.candidates), required_winners + 1):
+                for candidate in candidate_set:
+                    profile = helper.complete_profile(helper.tally_patterns(candidate, sorted(set(candidate_set) - set([candidate]))))
+                    helper.strength_solver = STRENGTH_SOLVER_FLOW
+                    flow = helper.strength_of_vote_management(profile)
+                    helper.strength_solver = STRENGTH_SOLVER_SUBSETS
+                    self.assertAlmostEqual(flow, helper.strength_of_vote_management(profile), places=7)
+        self.assertEqual(
+            SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING, strength_solver=STRENGTH_SOLVER_FLOW).as_dict()['winners'],
+            SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING, strength_solver=STRENGTH_SOLVER_SUBSETS).as_dict()['winners'],
+        )
+        self.assertRaises(Exception, SchulzeSTV, input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING, strength_solver="unknown")
+
+    #
+    def test_completion_without_numpy(self):
+
+        # Generate data
+        input = [
+            {"count": 60, "ballot": [["a"], ["b"], ["c"], ["d"], ["e"]]},
+            {"count": 45, "ballot": [["c"], ["e"], ["a"], ["b"]]},
+            {"count": 30, "ballot": [["d"], ["b"]]},
+            {"count": 15, "ballot": [["e"], ["d"], ["a"]]},
+            {"count": 10, "ballot": [["b"], ["c", "d"]]},
+        ]
+        helper = SchulzeHelper()
+        helper.standardize_ballots(input, helper.BALLOT_NOTATION_GROUPING)
+        helper.required_winners = 3
+        helper.generate_completed_patterns()
+        vectorized = helper.proportional_completion("e", ["a", "b", "d"])
+        numpy, schulze_helper.numpy = schulze_helper.numpy, None
+        try:
+            helper.generate_completed_patterns()
+            iterative = helper.proportional_completion("e", ["a", "b", "d"])
+            output = SchulzeSTV(input, required_winners=3, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING).as_dict()
+        finally:
+            schulze_helper.numpy = numpy
+
+        # Run tests
+        self.assertEqual(sorted(vectorized.keys()), sorted(iterative.keys()))
+        for pattern in vectorized:
+            self.assertAlmostEqual(vectorized[pattern], iterative[pattern])
+        self.assertAlmostEqual(sum(iterative.values()), 160)
+        self.assertEqual(output, SchulzeSTV(input, required_winners=3, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING).as_dict())
+
+    #
+    def test_refinement_index(self):
+
+        # Generate data
+        helper = SchulzeHelper()
+        helper.required_winners = 3
+        helper.generate_completed_patterns()
+        completion_pattern = (2, 1, 2)
+        base_code, indifferent_code, projections, compatible = helper.refinement_index(helper.encode_pattern(completion_pattern))
+        targets = {}
+        for code in range(len(helper.patterns)):
+            if projections[code] != indifferent_code:
+                targets[helper.patterns[code]] = helper.patterns[base_code + projections[code]]
+
+        # Run tests
+        self.assertEqual(len(targets), 27 - 3)
+        self.assertEqual(targets[(1, 3, 3)], (1, 1, 3))
+        self.assertEqual(targets[(2, 3, 1)], (2, 1, 1))
+        self.assertEqual(targets[(3, 1, 2)], (3, 1, 2))
+        helper.refinement_index(helper.encode_pattern((2, 3, 2)))
+        self.assertEqual(len(helper.refinements), 2)
+        self.assertEqual(len(helper.projections), 1)
+
+    #
+    def test_profile_cache_eviction(self):
+        cache = ProfileCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertEqual(cache.get("b"), None)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (3, 1, 2))
+
+    # Dave is ranked last by every voter, so no set of winners that includes
+    # him can win, and the count goes ahead exactly as it would without him
+    def test_dominance_pruning(self):
+
+        # Generate data
+        input = [
+            {"count": 12, "ballot": [["Andrea"], ["Brad"], ["Carter"], ["Dave"]]},
+            {"count": 26, "ballot": [["Andrea"], ["Carter"], ["Brad"], ["Dave"]]},
+            {"count": 12, "ballot": [["Andrea"], ["Carter"], ["Brad"], ["Dave"]]},
+            {"count": 13, "ballot": [["Carter"], ["Andrea"], ["Brad"], ["Dave"]]},
+            {"count": 27, "ballot": [["Brad"], ["Andrea", "Carter"], ["Dave"]]},
+        ]
+        output = SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING).as_dict()
+
+        # Run tests
+        self.assertEqual(output, {
+            'candidates': set(['Andrea', 'Brad', 'Carter', 'Dave']),
+            'pruning': {'candidates': set(['Dave']), 'vote_managements': 0},
+            'actions': [
+                {'edges': set([(('Brad', 'Carter'), ('Andrea', 'Carter')), (('Brad', 'Carter'), ('Andrea', 'Brad'))])},
+                {'nodes': set([('Brad', 'Carter')])},
+                {'edges': set([(('Andrea', 'Carter'), ('Andrea', 'Brad'))])},
+                {'nodes': set([('Andrea', 'Carter')])}
+            ],
+            'winners': set(['Andrea', 'Brad'])
+        })
+
+    # Frank is last on all but one ballot, which is still enough to keep him
+    # in contention, but the vote managements with him among the winners that
+    # no voter could support are skipped.
+    def test_uncompetitive_candidate_pruning(self):
+
+        # Generate data
+        input = [
+            {"count": 30, "ballot": [["Andrea"], ["Brad"], ["Carter"], ["Dave"], ["Erin"], ["Frank"]]},
+            {"count": 25, "ballot": [["Brad"], ["Carter"], ["Erin"], ["Andrea"], ["Dave"], ["Frank"]]},
+            {"count": 24, "ballot": [["Carter"], ["Dave"], ["Andrea"], ["Erin"], ["Brad"], ["Frank"]]},
+            {"count": 20, "ballot": [["Dave"], ["Erin"], ["Brad"], ["Andrea"], ["Carter"], ["Frank"]]},
+            {"count": 1, "ballot": [["Erin"], ["Andrea"], ["Dave"], ["Carter"], ["Frank"], ["Brad"]]},
+        ]
+        output = SchulzeSTV(input, required_winners=3, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING).as_dict()
+
+        # Run tests
+        self.assertEqual(output['pruning'], {'candidates': set(), 'vote_managements': 24})
+        self.assertEqual(output['winners'], set(['Andrea', 'Brad', 'Carter']))
+
     #
     def test_one_ballot_one_winner(self):
 
@@ -128,6 +322,7 @@ class TestSchulzeSTV(unittest.TestCase):
         # Run tests
         self.assertEqual(output, {
             'candidates': set(['Paper', 'Wood', 'Metal', 'Plastic']),
+            'pruning': {'candidates': set([]), 'vote_managements': 6},
             'winners': set(['Paper', 'Metal'])
         })
 
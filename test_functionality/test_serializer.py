@@ -0,0 +1,137 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+from pyvotecore import serializer
+from pyvotecore.serializer import ResultSerializer
+from pyvotecore.ranked_pairs import RankedPairs
+from pyvotecore.schulze_stv import SchulzeSTV
+from pyvotecore.stv import STV
+from StringIO import StringIO
+import unittest
+import json
+
+
+class TestSerializer(unittest.TestCase):
+
+    # Sets become lists and tuple-keyed pairs are nested by candidate
+    def test_ranked_pairs_json(self):
+
+        # Generate data
+        input = [
+            {"count": 4, "ballot": {"A": 1, "B": 2, "C": 3}},
+            {"count": 3, "ballot": {"B": 1, "C": 2, "A": 3}},
+            {"count": 2, "ballot": {"C": 1, "A": 2, "B": 3}},
+        ]
+        result = RankedPairs(input, ballot_notation=RankedPairs.BALLOT_NOTATION_RANKING)
+        output = json.loads(ResultSerializer().dumps(result))
+        output["candidates"] = set(output["candidates"])
+
+        # Run tests
+        self.assertEqual(output, {
+            'candidates': set(['A', 'B', 'C']),
+            'pairs': {
+                'A': {'B': 6, 'C': 4},
+                'B': {'A': 3, 'C': 7},
+                'C': {'A': 5, 'B': 2},
+            },
+            'strong_pairs': {
+                'A': {'B': 6},
+                'B': {'C': 7},
+                'C': {'A': 5},
+            },
+            'rounds': [
+                {'action': 'added', 'pair': ['B', 'C']},
+                {'action': 'added', 'pair': ['A', 'B']},
+                {'action': 'skipped', 'pair': ['C', 'A']},
+            ],
+            'winner': 'A',
+        })
+
+    # The compact mode keeps the outcome and drops the audit trail
+    def test_compact(self):
+
+        # Generate data
+        input = [
+            {"count": 4, "ballot": ["A", "B"]},
+            {"count": 2, "ballot": ["B", "C"]},
+            {"count": 3, "ballot": ["C"]},
+        ]
+        output = json.loads(ResultSerializer(compact=True).dumps(STV(input, required_winners=2)))
+
+        # Run tests
+        self.assertEqual(sorted(output), ['candidates', 'quota', 'remaining_candidates', 'winners'])
+        self.assertEqual(set(output["winners"]), set(['A', 'C']))
+
+    # Streaming a result to a file writes what dumps returns, and large sets
+    # are written in slices
+    def test_stream(self):
+
+        # Generate data
+        slice_size, serializer.SLICE_SIZE = serializer.SLICE_SIZE, 2
+        try:
+            input = [
+                {"count": 12, "ballot": [["Andrea"], ["Brad"], ["Carter"]]},
+                {"count": 26, "ballot": [["Andrea"], ["Carter"], ["Brad"]]},
+                {"count": 12, "ballot": [["Andrea"], ["Carter"], ["Brad"]]},
+                {"count": 13, "ballot": [["Carter"], ["Andrea"], ["Brad"]]},
+                {"count": 27, "ballot": [["Brad"]]},
+            ]
+            result = SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING).as_dict()
+            stream = StringIO()
+            ResultSerializer().dump(result, stream)
+            output = json.loads(stream.getvalue())
+        finally:
+            serializer.SLICE_SIZE = slice_size
+
+        # Run tests
+        self.assertEqual(stream.getvalue(), ResultSerializer().dumps(result))
+        self.assertEqual(set(output["winners"]), set(['Andrea', 'Brad']))
+        self.assertEqual(
+            set((tuple(source), tuple(target)) for source, target in output["actions"][0]["edges"]),
+            result["actions"][0]["edges"],
+        )
+
+    # Non-string keys are written the way the json module writes them
+    def test_json_keys(self):
+
+        # Generate data
+        output = ResultSerializer().dumps({1: None, None: set([2]), (3, 4): True})
+
+        # Run tests
+        self.assertEqual(json.loads(output), {"1": None, "null": [2], "3": {"4": True}})
+
+    #
+    def test_msgpack(self):
+
+        # Generate data
+        input = [
+            {"count": 4, "ballot": {"A": 1, "B": 2, "C": 3}},
+            {"count": 3, "ballot": {"B": 1, "C": 2, "A": 3}},
+            {"count": 2, "ballot": {"C": 1, "A": 2, "B": 3}},
+        ]
+        result = RankedPairs(input, ballot_notation=RankedPairs.BALLOT_NOTATION_RANKING)
+
+        # Run tests
+        if serializer.msgpack is None:
+            self.assertRaises(Exception, ResultSerializer, ResultSerializer.FORMAT_MSGPACK)
+        else:
+            output = serializer.msgpack.unpackb(ResultSerializer(ResultSerializer.FORMAT_MSGPACK).dumps(result), raw=False)
+            self.assertEqual(output["winner"], 'A')
+            self.assertEqual(output["pairs"]["B"], {'A': 3, 'C': 7})
+            self.assertEqual(output["rounds"][0]["pair"], ['B', 'C'])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from pyvotecore.stats import Stats
+from pyvotecore.schulze_stv import SchulzeSTV
+from pyvotecore.schulze_method import SchulzeMethod
+from pyvotecore.schulze_npr import SchulzeNPR
+from pyvotecore.ranked_pairs import RankedPairs
+from pyvotecore.irv import IRV
+from pyvotecore.plurality import Plurality
+import unittest
+
+
+class TestStats(unittest.TestCase):
+
+    #
+    def test_stats_are_opt_in(self):
+
+        # Generate data
+        input = [
+            {"count": 3, "ballot": [["A"], ["B"]]},
+            {"count": 2, "ballot": [["B"], ["A"]]},
+        ]
+        output = SchulzeMethod(input, ballot_notation=SchulzeMethod.BALLOT_NOTATION_GROUPING).as_dict()
+
+        # Run tests
+        self.assertFalse("stats" in output)
+
+    #
+    def test_schulze_stv_phases_and_counts(self):
+
+        # Generate data
+        input = [
+            {"count": 60, "ballot": [["A"], ["B"], ["C"], ["D"]]},
+            {"count": 45, "ballot": [["B"], ["D"], ["C"], ["A"]]},
+            {"count": 30, "ballot": [["C", "D"], ["A"], ["B"]]},
+            {"count": 15, "ballot": [["D"], ["A"], ["B"], ["C"]]},
+        ]
+        output = SchulzeSTV(input, required_winners=2, ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING, stats=True).as_dict()
+
+        # Run tests
+        self.assertEqual(
+            set(output["stats"]["timings"].keys()),
+            set(["standardize", "results", "patterns", "pruning", "graph", "vote_management", "tally", "completion", "strength", "winner"]),
+        )
+        counts = output["stats"]["counts"]
+        self.assertEqual(counts["vote_managements"], 12)
+        self.assertEqual(counts.get("profile_cache_hits", 0) + counts["profile_cache_misses"], 12)
+        self.assertEqual(counts["subset_solves"], counts["profile_cache_misses"])
+        self.assertTrue(output["stats"]["timings"]["results"] >= output["stats"]["timings"]["vote_management"])
+
+    #
+    def test_max_flow_count(self):
+
+        # Generate data
+        input = [
+            {"count": 60, "ballot": [["A"], ["B"], ["C"]]},
+            {"count": 40, "ballot": [["B"], ["C"], ["A"]]},
+        ]
+        output = SchulzeSTV(
+            input,
+            required_winners=2,
+            ballot_notation=SchulzeSTV.BALLOT_NOTATION_GROUPING,
+            strength_solver="flow",
+            stats=True,
+        ).as_dict()
+
+        # Run tests
+        self.assertTrue(output["stats"]["counts"]["max_flows"] >= output["stats"]["counts"]["profile_cache_misses"])
+        self.assertFalse("subset_solves" in output["stats"]["counts"])
+
+    #
+    def test_nested_elections_report_once(self):
+
+        # Generate data
+        reports = []
+        input = [
+            {"count": 26, "ballot": ["Amy", "Brad"]},
+            {"count": 22, "ballot": ["Brad", "Chad"]},
+            {"count": 23, "ballot": ["Chad", "Amy"]},
+        ]
+        output = IRV(input, stats=lambda voting_system, stats: reports.append((voting_system, stats))).as_dict()
+
+        # Run tests
+        self.assertEqual(len(reports), 1)
+        self.assertTrue(isinstance(reports[0][0], IRV))
+        self.assertEqual(reports[0][1]["counts"]["stv_rounds"], 2)
+        self.assertEqual(reports[0][1], output["stats"])
+
+    #
+    def test_shared_stats_accumulate(self):
+
+        # Generate data
+        stats = Stats()
+        input = [
+            {"count": 10, "ballot": [["A"], ["B"], ["C"]]},
+            {"count": 10, "ballot": [["B"], ["C"], ["A"]]},
+            {"count": 10, "ballot": [["C"], ["A"], ["B"]]},
+        ]
+        RankedPairs(input, ballot_notation=RankedPairs.BALLOT_NOTATION_GROUPING, stats=stats)
+        RankedPairs(input, ballot_notation=RankedPairs.BALLOT_NOTATION_GROUPING, stats=stats)
+        Plurality([{"count": 1, "ballot": "A"}, {"count": 1, "ballot": "B"}], stats=stats)
+
+        # Run tests
+        self.assertEqual(stats.counts["cycle_checks"], 6)
+        self.assertEqual(stats.counts["ties_broken"], 5)
+
+    # SchulzeNPR breaks its ties through the election like the other systems
+    def test_ordering_ties_are_counted(self):
+
+        # Generate data
+        input = [
+            {"count": 10, "ballot": [["A"], ["B"], ["C"]]},
+            {"count": 10, "ballot": [["B"], ["C"], ["A"]]},
+            {"count": 10, "ballot": [["C"], ["A"], ["B"]]},
+        ]
+        output = SchulzeNPR(input, ballot_notation=SchulzeNPR.BALLOT_NOTATION_GROUPING, stats=True).as_dict()
+
+        # Run tests
+        self.assertEqual(output["stats"]["counts"]["ties_broken"], 1)
+        self.assertEqual(set(output["tie_breaker"]), set(["A", "B", "C"]))
+
+    #
+    def test_repeated_phases_are_timed_once(self):
+
+        # Generate data
+        stats = Stats()
+        with stats.phase("outer"):
+            with stats.phase("outer"):
+                with stats.phase("inner"):
+                    pass
+
+        # Run tests
+        self.assertEqual(set(stats.timings.keys()), set(["outer", "inner"]))
+        self.assertEqual(stats.running, {"outer": 0, "inner": 0})
+
+    #
+    def test_invalid_stats(self):
+        self.assertRaises(Exception, Stats.coerce, "verbose")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,7 +13,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from pyvotecore.stv import STV
+from pyvotecore.stv import STV, BallotPiles
 import unittest
 
 
@@ -197,6 +197,113 @@ class TestSTV(unittest.TestCase):
         # Run tests
         self.assertEqual(output["winners"], set(["A", "B", "C"]))
 
+    # STV, identical ballots collapsed into weighted ballots
+    def test_stv_aggregated_ballots(self):
+
+        # Generate data
+        input = (
+            [{"ballot": ["orange"]}] * 4
+            + [{"count": 1, "ballot": ["pear", "orange"]}] * 2
+            + [{"count": 4, "ballot": ["chocolate", "strawberry"]}] * 2
+            + [{"count": 2, "ballot": ["chocolate", "sweets"]}] * 2
+            + [{"count": 1, "ballot": ["strawberry"]}, {"count": 1, "ballot": ["sweets"]}]
+        )
+        stv = STV(input, required_winners=3)
+
+        # Run tests
+        self.assertEqual(len(stv.ballots), 6)
+        self.assertEqual(stv.compression_ratio, 2.0)
+        self.assertEqual(stv.as_dict()["winners"], set(['orange', 'strawberry', 'chocolate']))
+
+    # STV, ballots consumed from a generator
+    def test_stv_generated_ballots(self):
+
+        # Generate data
+        input = (
+            {"count": 1, "ballot": ballot}
+            for ballot in [["c1", "c2", "c3"]] * 56 + [["c2", "c3", "c1"]] * 40 + [["c3", "c1", "c2"]] * 20
+        )
+        stv = STV(input, required_winners=2)
+
+        # Run tests
+        self.assertEqual(stv.ballot_entries, 116)
+        self.assertEqual(stv.as_dict(), {
+            'candidates': set(['c1', 'c2', 'c3']),
+            'quota': 39,
+            'rounds': [{
+                'tallies': {'c3': 20.0, 'c2': 40.0, 'c1': 56.0},
+                'winners': set(['c2', 'c1'])
+            }],
+            'winners': set(['c2', 'c1'])
+        })
+
+
+    # Ballot piles, transferring only the excluded candidate's pile
+    def test_ballot_piles(self):
+
+        # Generate data
+        piles = BallotPiles([(0, 1, 2), (1, 2), (2, 0), (0,)], [4.0, 3.0, 2.0, 1.0], 3)
+        piles.reset([])
+        piles.scale(0, 0.5)
+        piles.exclude([0])
+
+        # Run tests
+        self.assertEqual(piles.tallies(), {1: 5.0, 2: 2.0})
+        self.assertEqual(piles.piles, [[], [1, 0], [2]])
+        self.assertEqual(piles.cursors, [1, 0, 0, 1])
+        self.assertTrue(piles.live())
+        self.assertEqual(piles.votes(), 9.0)
+
+    # Scaling a pile keeps its total in step without a transfer
+    def test_ballot_piles_scale(self):
+
+        # Generate data
+        piles = BallotPiles([(0, 1), (0, 2), (1,)], [4.0, 2.0, 1.0], 3)
+        piles.reset([])
+        piles.scale(0, 0.25)
+
+        # Run tests
+        self.assertEqual(piles.tallies(), {0: 1.5, 1: 1.0, 2: 0})
+
+    # Transfers from two surpluses in turn carry B to exactly the quota
+    def test_stv_surplus_reaches_quota(self):
+
+        # Generate data
+        input = [
+            {"count": 2, "ballot": ["A", "B"]},
+            {"count": 4, "ballot": ["E", "B", "D"]},
+            {"count": 5, "ballot": ["E", "D", "B", "A", "C"]},
+        ]
+        output = STV(input, required_winners=4).as_dict()
+
+        # Run tests
+        self.assertEqual(output["quota"], 3)
+        self.assertEqual(output["rounds"][2], {'tallies': {'A': 2.0, 'B': 3.0, 'C': 0.0}, 'winners': set(['B'])})
+        self.assertEqual(output["winners"], set(['A', 'B', 'D', 'E']))
+
+    # C's surplus, transferred at three tenths of a vote, carries A to exactly the quota
+    def test_stv_surpluses_reach_quota_together(self):
+
+        # Generate data
+        input = [
+            {"count": 4, "ballot": ["A", "B", "D", "C"]},
+            {"count": 7, "ballot": ["D", "C", "B"]},
+            {"count": 9, "ballot": ["C", "A", "D", "B"]},
+            {"count": 6, "ballot": ["D", "B"]},
+            {"count": 1, "ballot": ["C", "A"]},
+        ]
+        output = STV(input, required_winners=3).as_dict()
+
+        # Run tests
+        self.assertEqual(output, {
+            'candidates': set(['A', 'B', 'C', 'D']),
+            'quota': 7,
+            'rounds': [
+                {'tallies': {'A': 4.0, 'B': 0.0, 'C': 10.0, 'D': 13.0}, 'winners': set(['C', 'D'])},
+                {'tallies': {'A': 7.0, 'B': 6.0}, 'winners': set(['A'])},
+            ],
+            'winners': set(['A', 'C', 'D']),
+        })
 
 
 if __name__ == "__main__":
@@ -0,0 +1,225 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# This script benchmarks every voting system over a sweep of ballot, candidate
+# and seat counts. Each case runs in a fresh process, so that its peak memory
+# can be measured on its own, and the time spent in each phase of the count is
+# recorded alongside the total. Results are written as JSON so that they can
+# be compared across commits, e.g.:
+#
+#   python -m test_performance.benchmark --ballots 1000,10000 --output results.json
+from pyvotecore.plurality import Plurality
+from pyvotecore.plurality_at_large import PluralityAtLarge
+from pyvotecore.irv import IRV
+from pyvotecore.stv import STV
+from pyvotecore.schulze_method import SchulzeMethod
+from pyvotecore.ranked_pairs import RankedPairs, RankedPairsByGraph
+from pyvotecore.schulze_stv import SchulzeSTV
+from pyvotecore.schulze_pr import SchulzePR
+from pyvotecore.schulze_npr import SchulzeNPR
+from pyvotecore.schulze_by_graph import SchulzeMethodByGraph, SchulzeNPRByGraph
+from pyvotecore.pairwise_matrix import PairwiseMatrix
+from pyvotecore.ballot_generator import BallotGenerator
+from pyvotecore import condorcet
+import argparse
+import functools
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+GROUPING = SchulzeMethod.BALLOT_NOTATION_GROUPING
+
+# Each system is listed with whether it takes a number of seats, how to write
+# the generated rankings in the notation it expects, and how to count them
+SYSTEMS = [
+    ("Plurality", False, lambda rankings, seats: [{"ballot": ranking[0]} for ranking in rankings], lambda ballots, seats: Plurality(ballots)),
+    ("PluralityAtLarge", True, lambda rankings, seats: [{"ballot": ranking[:seats]} for ranking in rankings], lambda ballots, seats: PluralityAtLarge(ballots, required_winners=seats)),
+    ("IRV", False, lambda rankings, seats: [{"ballot": ranking} for ranking in rankings], lambda ballots, seats: IRV(ballots)),
+    ("STV", True, lambda rankings, seats: [{"ballot": ranking} for ranking in rankings], lambda ballots, seats: STV(ballots, required_winners=seats)),
+    ("SchulzeMethod", False, lambda rankings, seats: grouped(rankings), lambda ballots, seats: SchulzeMethod(ballots, ballot_notation=GROUPING)),
+    ("RankedPairs", False, lambda rankings, seats: grouped(rankings), lambda ballots, seats: RankedPairs(ballots, ballot_notation=GROUPING)),
+    ("SchulzeSTV", True, lambda rankings, seats: grouped(rankings), lambda ballots, seats: SchulzeSTV(ballots, required_winners=seats, ballot_notation=GROUPING)),
+    ("SchulzePR", True, lambda rankings, seats: grouped(rankings), lambda ballots, seats: SchulzePR(ballots, winner_threshold=seats, ballot_notation=GROUPING)),
+    ("SchulzeNPR", False, lambda rankings, seats: grouped(rankings), lambda ballots, seats: SchulzeNPR(ballots, ballot_notation=GROUPING)),
+    ("SchulzeMethodByGraph", False, lambda rankings, seats: edges(rankings), lambda edges, seats: SchulzeMethodByGraph(edges)),
+    ("SchulzeNPRByGraph", False, lambda rankings, seats: edges(rankings), lambda edges, seats: SchulzeNPRByGraph(edges)),
+    ("RankedPairsByGraph", False, lambda rankings, seats: edges(rankings), lambda edges, seats: RankedPairsByGraph(edges)),
+]
+
+VOTING_SYSTEMS = [
+    Plurality, PluralityAtLarge, IRV, STV, SchulzeMethod, RankedPairs, SchulzeSTV, SchulzePR,
+    SchulzeNPR, SchulzeMethodByGraph, SchulzeNPRByGraph, RankedPairsByGraph,
+]
+
+# Methods whose inclusive running time is reported as a phase of the count
+PHASES = [
+    ("standardize", ["standardize_ballots"]),
+    ("tally", ["ballots_into_matrix", "tally_patterns"]),
+    ("graph", ["matrix_into_graph", "remove_weak_edges"]),
+    ("completion", ["complete_profile"]),
+    ("strength", ["strength_of_vote_management"]),
+    ("winner", ["condorcet_completion_method", "strongest_path_order"]),
+]
+
+
+def grouped(rankings):
+    return [{"ballot": [[candidate] for candidate in ranking]} for ranking in rankings]
+
+
+def edges(rankings):
+    return PairwiseMatrix(grouped(rankings), GROUPING).edges()
+
+
+# Generates voters that rank a random, possibly truncated, selection of the
+# candidates, and is reproducible given the same seed
+def generate_rankings(ballots, candidates, seed):
+    generator = BallotGenerator(["C%02d" % i for i in range(candidates)], seed=seed, truncation_rate=0.5)
+    return [ballot["ballot"] for ballot in generator.ballots(ballots, BallotGenerator.BALLOT_NOTATION_ORDERED)]
+
+
+# Wraps a method so that the time spent in its outermost calls is added to
+# the phase's total
+def timed(method, timings, phase):
+    depth = [0]
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        depth[0] += 1
+        start = time.time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+            if depth[0] == 0:
+                timings[phase] = timings.get(phase, 0.0) + time.time() - start
+    return wrapper
+
+
+def instrument(voting_systems, timings):
+    instrumented = set()
+    for voting_system in voting_systems:
+        for phase, method_names in PHASES:
+            for method_name in method_names:
+                for cls in voting_system.__mro__:
+                    if method_name in cls.__dict__ and (cls, method_name) not in instrumented:
+                        instrumented.add((cls, method_name))
+                        method = cls.__dict__[method_name]
+                        if isinstance(method, staticmethod):
+                            setattr(cls, method_name, staticmethod(timed(method.__func__, timings, phase)))
+                        else:
+                            setattr(cls, method_name, timed(method, timings, phase))
+
+
+# Runs a single case. This is called in a fresh process, so the instrumented
+# methods and the peak memory of one case never leak into another.
+def run_case(case):
+    name, ballot_count, candidates, seats, seed = case
+    takes_seats, notation, count = dict((system[0], system[1:]) for system in SYSTEMS)[name]
+    ballots = notation(generate_rankings(ballot_count, candidates, seed), seats)
+    timings = {}
+    instrument(VOTING_SYSTEMS, timings)
+    baseline_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.time()
+    result = count(ballots, seats)
+    count_time = time.time() - start
+    start = time.time()
+    result.as_dict()
+    as_dict_time = time.time() - start
+
+    return {
+        "system": name,
+        "ballots": ballot_count,
+        "candidates": candidates,
+        "seats": seats,
+        "seed": seed,
+        "seconds": count_time,
+        "as_dict_seconds": as_dict_time,
+        "phases": timings,
+        "baseline_memory_kb": baseline_memory,
+        "peak_memory_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def generate_cases(systems, ballot_counts, candidate_counts, seat_counts, seed, repeat):
+    cases = []
+    for name, takes_seats, notation, count in SYSTEMS:
+        if name not in systems:
+            continue
+        for ballots in ballot_counts:
+            for candidates in candidate_counts:
+                for seats in (seat_counts if takes_seats else [None]):
+                    if seats is not None and seats >= candidates:
+                        continue
+                    for i in range(repeat):
+                        cases.append((name, ballots, candidates, seats, seed + i))
+    return cases
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.STDOUT).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(cases, progress=None):
+    results = []
+    for case in cases:
+        pool = multiprocessing.Pool(1)
+        try:
+            results.append(pool.apply(run_case, (case,)))
+        finally:
+            pool.close()
+            pool.join()
+        if progress is not None:
+            progress.write("%(system)s ballots=%(ballots)s candidates=%(candidates)s seats=%(seats)s: %(seconds).3fs, %(peak_memory_kb)sKB\n" % results[-1])
+    return {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+        "numpy": condorcet.numpy is not None,
+        "results": results,
+    }
+
+
+def integers(value):
+    return [int(number) for number in value.split(",")]
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmark the voting systems over a sweep of election sizes.")
+    parser.add_argument("--systems", default=",".join(system[0] for system in SYSTEMS), help="comma separated voting systems to run")
+    parser.add_argument("--ballots", type=integers, default=[100, 1000], help="comma separated ballot counts")
+    parser.add_argument("--candidates", type=integers, default=[4, 7], help="comma separated candidate counts")
+    parser.add_argument("--seats", type=integers, default=[2, 3], help="comma separated seat counts")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first generated election")
+    parser.add_argument("--repeat", type=int, default=1, help="number of elections generated per case")
+    parser.add_argument("--output", help="file to write the JSON results to, instead of standard output")
+    arguments = parser.parse_args(arguments)
+
+    cases = generate_cases(arguments.systems.split(","), arguments.ballots, arguments.candidates, arguments.seats, arguments.seed, arguments.repeat)
+    results = run(cases, progress=sys.stderr)
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+    else:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
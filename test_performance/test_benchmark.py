@@ -0,0 +1,39 @@
+# Copyright (C) 2009, Brad Beattie
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from test_performance import benchmark
+import json
+import unittest
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_cases(self):
+        cases = benchmark.generate_cases(["IRV", "SchulzeSTV"], [10, 20], [3, 4], [2, 3], 5, 1)
+        self.assertEqual(len(cases), 2 * 2 + 2 * 1 + 2 * 2)
+        self.assertTrue(("SchulzeSTV", 10, 3, 3, 5) not in cases)
+        self.assertTrue(("IRV", 20, 4, None, 5) in cases)
+
+    def test_run(self):
+        results = benchmark.run(benchmark.generate_cases(["SchulzeSTV", "SchulzeNPRByGraph"], [50], [4], [2], 0, 1))
+
+        # Run tests
+        self.assertEqual([result["system"] for result in results["results"]], ["SchulzeSTV", "SchulzeNPRByGraph"])
+        self.assertTrue(results["results"][0]["peak_memory_kb"] > 0)
+        self.assertTrue(set(["standardize", "completion", "strength"]) <= set(results["results"][0]["phases"]))
+        self.assertEqual(json.loads(json.dumps(results))["results"][1]["seats"], None)
+
+if __name__ == "__main__":
+    unittest.main()